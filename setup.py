@@ -1,40 +1,50 @@
+import argparse
+import os
 import sys
 
-
-def read_file(path):
-    try:
-        with open(path, 'r') as f:
-            return f.read()
-    except Exception as e:
-        print('Failed to read "{}": {}'.format(path, e))
-        return None
-
-
-def write_file(content, path):
-    try:
-        with open(path, 'w') as f:
-            f.write(content)
-            return 0
-    except Exception as e:
-        print('Failed to write into "{}"'.format(path))
-        return 4
-
-
-def switch_manifest(browser):
-    content = read_file('browsers/{}.json'.format(browser))
-    if content is None:
-        print('aborting...')
-        return 3
-    return write_file(content, 'web-extension/manifest.json')
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'tools'))
+from bundler import write_bundles  # noqa: E402
+from manifest import write_manifest  # noqa: E402
+from packager import BROWSERS, BUILD_DIR, build  # noqa: E402
+from strings_compiler import compile_strings  # noqa: E402
 
 
 def show_options():
     print("Browser must be passed (either 'firefox' or 'chrome'). Example:")
     print("> python setup.py firefox")
+    print("With `--no-bundle`, the content scripts are injected one by one rather than")
+    print("through the bundle of their reader:")
+    print("> python setup.py firefox --no-bundle")
+    print("To build the archives of the extension:")
+    print("> python setup.py build [--browser firefox,chrome] [--dest build] [--force]")
+
+
+def build_command(argv):
+    parser = argparse.ArgumentParser(prog='setup.py build',
+                                     description='Builds the archive of the extension for '
+                                                 'every browser, into DEST/<browser>/')
+    parser.add_argument('--browser', default=','.join(BROWSERS),
+                        type=lambda value: value.split(','),
+                        help='Comma-separated list of the browsers to build for')
+    parser.add_argument('--dest', default=BUILD_DIR,
+                        help='Directory of the archives (default: {})'.format(BUILD_DIR))
+    parser.add_argument('--force', action='store_true',
+                        help='Build the archives even if their inputs did not change')
+    args = parser.parse_args(argv)
+    for browser in args.browser:
+        if browser not in BROWSERS:
+            print('Invalid browser passed: "{}"'.format(browser))
+            return 2
+    return build(args.browser, args.dest, args.force)
 
 
 def main():
     argv = sys.argv[1:]
+    if len(argv) > 0 and argv[0] == 'build':
+        return build_command(argv[1:])
+    bundled = '--no-bundle' not in argv
+    if not bundled:
+        argv.remove('--no-bundle')
     if len(argv) != 1:
         show_options()
         return 1
@@ -45,7 +55,14 @@ def main():
         print("Invalid browser passed")
         show_options()
         return 2
-    return switch_manifest(argv[0])
+    ret = write_manifest(argv[0], bundled=bundled)
+    if ret != 0:
+        return ret
+    # The manifest injects the compiled strings rather than strings.js
+    ret = compile_strings()
+    if ret != 0 or not bundled:
+        return ret
+    return write_bundles()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,303 @@
+import os
+import random
+
+import pytest
+
+from .utils import artifacts
+from .utils import blocking
+from .utils import drivers
+from .utils.catalog import CATALOG, DEFAULT_CATALOG_PATH, DEFAULT_TTL
+from .utils.bmc import BmcController, init_sidebar
+from .utils import profiler
+from .utils import replay
+from .utils.retries import RETRY_REPORT
+from .utils import support
+
+
+def pytest_addoption(parser):
+    parser.addoption("--browser", action="append", default=[],
+                     help="List of webbrowsers to test (firefox, chrome)")
+    parser.addoption("--reader", action="append", default=[],
+                     help="List of readers to test, see module names in tests/func/utils/support/")
+    parser.addoption("--replay", choices=replay.MODES, default='off',
+                     help="Record the responses of the reader websites, or replay them without "
+                          "network access")
+    parser.addoption("--recordings", default=replay.DEFAULT_RECORDINGS_DIR,
+                     help="Directory of the recorded responses (default: {})"
+                          .format(replay.DEFAULT_RECORDINGS_DIR))
+    parser.addoption("--artifacts", default=artifacts.DEFAULT_ARTIFACTS_DIR,
+                     help="Directory of the screenshots, logs and dumps of the failing tests, "
+                          "or off (default: {})".format(artifacts.DEFAULT_ARTIFACTS_DIR))
+    parser.addoption("--block", choices=blocking.POLICIES, default=blocking.DEFAULT_POLICY,
+                     help="Resources of the reader pages which the browsers do not load: "
+                          "ads and trackers, images and media, all of them or none "
+                          "(default: {})".format(blocking.DEFAULT_POLICY))
+    parser.addoption("--catalog", default=DEFAULT_CATALOG_PATH,
+                     help="Cache of the candidate chapters loaded by the reader drivers "
+                          "(default: {})".format(DEFAULT_CATALOG_PATH))
+    parser.addoption("--catalog-ttl", type=float, default=DEFAULT_TTL,
+                     help="Seconds after which the cached candidate chapters are listed "
+                          "again (default: {})".format(DEFAULT_TTL))
+    parser.addoption("--profile-commands", nargs='?', const=profiler.DEFAULT_PROFILE_DIR,
+                     default=None, metavar='DIR',
+                     help="Record the WebDriver commands of every test, and write their "
+                          "report into DIR (default: {})".format(profiler.DEFAULT_PROFILE_DIR))
+    parser.addoption("--profile-top", type=int, default=10,
+                     help="Number of the slowest tests and helpers listed in the summary "
+                          "of --profile-commands")
+
+
+def is_xdist_worker(config):
+    return hasattr(config, 'workerinput')
+
+
+def runs_tests(config):
+    """
+        Whether the tests run in this process: not when only collecting them,
+        nor on the pytest-xdist controller, which hands them to its workers.
+    """
+    if config.option.collectonly:
+        return False
+    return is_xdist_worker(config) or not getattr(config.option, 'numprocesses', None)
+
+
+def pytest_configure(config):
+    # Started on the first failure (see `artifact_collector`)
+    config._artifacts = None
+    profile_dir = config.getoption('profile_commands')
+    if profile_dir is not None:
+        command_profiler = profiler.CommandProfiler(profile_dir, config.getoption('profile_top'))
+        config.pluginmanager.register(command_profiler, 'command-profiler')
+        drivers.configure(profiler=command_profiler)
+    block = config.getoption('block')
+    blocking.PAGE_LOADS.policy = block
+    drivers.configure(block=block)
+    mode = config.getoption('replay')
+    if mode == 'off':
+        CATALOG.configure(config.getoption('catalog'), config.getoption('catalog_ttl'))
+        return
+    # The candidates are recorded along with the responses, as they must be
+    # the same when replaying as when recording
+    CATALOG.configure(os.path.join(config.getoption('recordings'), 'catalog.json'),
+                      config.getoption('catalog_ttl') if mode == 'record' else None)
+    if not runs_tests(config):
+        return
+    config._replay_proxy = replay.ReplayProxy(mode, config.getoption('recordings'),
+                                              blocking.blocked_patterns(block)).start()
+    drivers.configure(proxy=config._replay_proxy.address)
+
+
+def pytest_unconfigure(config):
+    collector = getattr(config, '_artifacts', None)
+    if collector is not None:
+        collector.close()
+    proxy = getattr(config, '_replay_proxy', None)
+    if proxy is not None:
+        proxy.stop()
+
+
+def artifact_collector(config):
+    """
+        Returns the collector of the artifacts of the failing tests, started
+        when first needed, or None with `--artifacts off`.
+    """
+    directory = config.getoption('artifacts')
+    if config._artifacts is None and directory != 'off':
+        config._artifacts = artifacts.ArtifactCollector(directory)
+    return config._artifacts
+
+
+def exit_with_error(err):
+    print(err)
+    exit(1)
+
+
+def pytest_generate_tests(metafunc):
+    """
+        Generates `controller` and `reader_driver` fixtures, according to the
+        CLI options provided by the user.
+    """
+    print('')  # For logging clarity
+    if 'controller' in metafunc.fixturenames:
+        browsers = metafunc.config.getoption('browser')
+        if not browsers:
+            browsers = ['firefox', 'chrome']
+        browsers = sorted(set(browsers))
+        # Only handles: the browsers are started when first used by a test
+        controllers = [BmcController(browser) for browser in browsers]
+        metafunc.parametrize('controller', controllers, ids=browsers)
+
+    if 'reader_driver' in metafunc.fixturenames:
+        readers = metafunc.config.getoption('reader')
+        default_readers = [driver_name for driver_name in support.drivers]
+        if not readers:
+            readers = default_readers
+        else:
+            for reader in readers:
+                if reader not in default_readers:
+                    exit_with_error("Unknown reader `{}`. Aborting.".format(reader))
+        metafunc.parametrize('reader_driver', sorted(set(readers)), ids=sorted(set(readers)), indirect=True)
+
+
+def pytest_collection_modifyitems(config, items):
+    """
+        Assigns every test to a shard, for `pytest -n <workers> --dist
+        loadgroup` (pytest-xdist): the tests of a shard share a browser, a
+        reader and a test class, and run in order on the same worker, so that
+        the `order` marks still apply inside of it.
+    """
+    for item in items:
+        params = item.callspec.params if hasattr(item, 'callspec') else {}
+        parts = []
+        if 'controller' in params:
+            parts.append(params['controller'].browser)
+        if 'reader_driver' in params:
+            parts.append(params['reader_driver'])
+        parts.append(item.cls.__name__ if item.cls is not None else item.module.__name__)
+        item.add_marker(pytest.mark.xdist_group('-'.join(parts)))
+
+
+@pytest.fixture
+def reader_driver(controller, request):
+    """
+        Definition of the actual reader_driver fixture, controller by the user
+        input (CLI).
+
+        It is called by metafunc.parametrize in `pytest_generate_tests`, using
+        the indirect flag, which explains why it is defined as a function as
+        opposed to the `controller` fixture.
+    """
+    return support.drivers[request.param](controller.wrapped_driver)
+
+
+@pytest.fixture
+def unique_reader(controller):
+    """
+        This fixture instanciates a unique reader_driver to drive all the
+        web-extension tests which are not specifically tied to validating a
+        support module.
+
+        This allows selecting (hardcoded here) a single reader as the main test
+        target for generic web-extension features.
+    """
+    return support.drivers['manganato'](controller.wrapped_driver)
+
+
+# Storage snapshots of the preloaded library, per browser
+LIBRARIES = {}
+
+
+@pytest.fixture
+def preloaded_library(controller, unique_reader):
+    """
+        Starts the test with a library holding a single comic, "sample100",
+        and returns the URL of the page it was registered from. The browser
+        is left on an extension page, so the test must load a reader page.
+
+        The comic is only registered through the sidebar by the first test
+        using the fixture (per browser): the following ones start from a
+        snapshot of the storage, restored instantly.
+    """
+    library = LIBRARIES.get(controller.browser)
+    if library is None:
+        init_sidebar(unique_reader, controller)
+        controller.register('sample100')
+        library = LIBRARIES[controller.browser] = {
+            'url': controller.driver.current_url,
+            'storage': controller.snapshot_storage(),
+        }
+    controller.restore_storage(library['storage'])
+    return library['url']
+
+
+@pytest.fixture(autouse=True)
+def replay_seed(request):
+    """
+        When recording or replaying, the random choices of the reader drivers
+        (such as the comic loaded by `load_random`) must be the same for a
+        given test in both modes, for the pages to be found in the recordings.
+    """
+    if request.config.getoption('replay') != 'off':
+        random.seed(request.node.nodeid)
+
+
+@pytest.fixture(autouse=True)
+def current_test(request):
+    # Attribute the retries and page loads to the running test
+    RETRY_REPORT.current_test = request.node.nodeid
+    blocking.PAGE_LOADS.current_test = request.node.nodeid
+    yield
+    RETRY_REPORT.current_test = None
+    blocking.PAGE_LOADS.current_test = None
+
+
+@pytest.fixture(autouse=True)
+def before_tests(controller):
+    yield
+    # Nothing to reset if the test did not start the browser
+    if controller.started:
+        controller.reset()
+
+
+def pytest_sessionfinish(session, exitstatus):
+    # Ensure all drivers are exited before we exit py.test
+    drivers.release()
+    if is_xdist_worker(session.config):
+        # The reports are made by the controller, for all the workers (see
+        # `pytest_testnodedown`)
+        command_profiler = session.config.pluginmanager.get_plugin('command-profiler')
+        session.config.workeroutput['bmc_reports'] = {
+            'retries': RETRY_REPORT.dump(),
+            'page_loads': blocking.PAGE_LOADS.dump(),
+            'commands': command_profiler.dump() if command_profiler is not None else [],
+        }
+
+
+@pytest.hookimpl(optionalhook=True)
+def pytest_testnodedown(node, error):
+    """
+        Merges the reports of a pytest-xdist worker which finished into the
+        ones of the controller.
+    """
+    reports = getattr(node, 'workeroutput', {}).get('bmc_reports')
+    if reports is None:
+        return
+    RETRY_REPORT.merge(reports['retries'])
+    blocking.PAGE_LOADS.merge(reports['page_loads'])
+    command_profiler = node.config.pluginmanager.get_plugin('command-profiler')
+    if command_profiler is not None:
+        command_profiler.merge(reports['commands'])
+
+
+def pytest_terminal_summary(terminalreporter):
+    config = terminalreporter.config
+    # The workers' reports are merged into the controller's
+    if is_xdist_worker(config) or config.option.collectonly:
+        return
+    if len(RETRY_REPORT.records) > 0 or RETRY_REPORT.give_ups > 0:
+        terminalreporter.section('retries')
+        for line in RETRY_REPORT.lines():
+            terminalreporter.write_line(line)
+    if len(blocking.PAGE_LOADS.tests) > 0:
+        terminalreporter.section('page loads')
+        blocking.PAGE_LOADS.save()
+        for line in blocking.PAGE_LOADS.lines():
+            terminalreporter.write_line(line)
+
+
+def pytest_exception_interact(node, call, report):
+    if ('Module' in repr(node)):
+        print('\n=== MODULE ERROR ===')
+        print(node.obj)
+        print('=== END OR MODULE ERROR ===')
+    elif hasattr(node, "funcargs"):
+        controller = node.funcargs['controller']
+        if not controller.started:
+            return
+        collector = artifact_collector(node.config) if report.failed else None
+        if collector is not None:
+            directory = collector.collect(node.nodeid, controller, call.excinfo.exconly())
+            if directory is not None:
+                print('\n=== ARTIFACTS: {} ==='.format(directory))
+    else:
+        print(call)
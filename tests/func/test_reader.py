@@ -79,7 +79,7 @@ class TestRegister:
         # Retrieve out of sidebar focus
         cur_name = reader_driver.get_comic_name()
         with controller.sidebar.focus():
-            controller.sidebar.start_registration_nofocus()
+            controller.sidebar.start_registration()
             bookmark_input = controller.driver.find_element(
                 by=By.CSS_SELECTOR, value='#bookmark-name')
             assert bookmark_input.is_displayed()
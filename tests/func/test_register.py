@@ -90,15 +90,13 @@ class TestSingleComic:
             registered, 0) == 1
 
     @staticmethod
-    def test_toggle_click(controller, unique_reader):
+    def test_toggle_click(controller, unique_reader, preloaded_library):
         """
             Validates that when clicking on a comic, it is indeed
             expanded/collapsed, and that the source becomes visible
         """
         init_sidebar(unique_reader, controller)
-        orig_n_items = len(controller.sidebar.get_registered())
-        controller.register('sample100')
-        assert len(controller.sidebar.get_registered()) != orig_n_items
+        assert [r.name for r in controller.sidebar.get_registered()] == ['sample100']
 
         with controller.sidebar.focus():
             # Check toggling via clicking on the label-container
@@ -244,7 +242,7 @@ class TestKeyboard:
         init_sidebar(unique_reader, controller)
         assert len(controller.sidebar.get_registered()) == 0
         with controller.sidebar.focus():
-            controller.sidebar.start_registration_nofocus()
+            controller.sidebar.start_registration()
             bookmark_input = controller.driver.find_element(
                 by=By.CSS_SELECTOR, value='#bookmark-name')
             assert bookmark_input.is_displayed()
@@ -267,7 +265,7 @@ class TestKeyboard:
         init_sidebar(unique_reader, controller)
         assert len(controller.sidebar.get_registered()) == 0
         with controller.sidebar.focus():
-            controller.sidebar.start_registration_nofocus()
+            controller.sidebar.start_registration()
             body = controller.driver.find_element(by=By.TAG_NAME, value='body')
             body.send_keys(Keys.ESCAPE)
 
@@ -1,11 +1,14 @@
 from os import path
+import functools
 from functools import reduce
-import sys
 import time
 
 from selenium.common.exceptions import TimeoutException
 from selenium.webdriver.support.ui import WebDriverWait
 
+from .blocking import PAGE_LOADS
+from .retries import RetryPolicy
+
 def make_realpath(pathlist):
     fpath = reduce(lambda p, p2: path.join(p, p2), pathlist, '')
     return path.realpath(fpath)
@@ -15,56 +18,27 @@ class RetriableError(Exception):
     def __init__(self, msg):
         super(RetriableError, self).__init__(msg)
 
-def retry(retries=5, abort=True):
-    def decorator(func):
-        def wrapper(*args, **kwargs):
-            count = 0
-            while count < retries:
-                try:
-                    if count != 0:
-                        time.sleep(1)
-
-                    return func(*args, **kwargs)
-                except RetriableError as e:
-                    count += 1
-                    print(str(e), file=sys.stderr)
-                except TimeoutException as e:
-                    count += 1
-                    print(str(e), file=sys.stderr)
-
-            # Assert if abort is set, when all retries are exhausted
-            assert abort == False
-
-        return wrapper
-    return decorator
+def retry(retries=5, abort=True, deadline=60.0):
+    """
+        Retries the decorated function when it raises a RetriableError or a
+        TimeoutException (see RetryPolicy).
+    """
+    return RetryPolicy([RetriableError, TimeoutException], max_attempts=retries,
+                       deadline=deadline, abort=abort)
 
 
-def retry_on_ex(retry_types, retries=5, abort=True):
-    def decorator(func):
-        def wrapper(*args, **kwargs):
-            count = 0
-            while count < retries:
-                try:
-                    if count != 0:
-                        time.sleep(1)
-
-                    return func(*args, **kwargs)
-                except Exception as e:
-                    if type(e) in retry_types:
-                        count += 1
-                        print(str(e), file=sys.stderr)
-                    else:
-                        raise
-
-            # Assert if abort is set, when all retries are exhausted
-            assert abort == False
-
-        return wrapper
-    return decorator
+def retry_on_ex(retry_types, retries=5, abort=True, deadline=60.0):
+    """
+        Retries the decorated function when it raises an exception of exactly
+        one of `retry_types`, and not of a subclass of them (see RetryPolicy).
+    """
+    return RetryPolicy(retry_types, max_attempts=retries, deadline=deadline, abort=abort,
+                       exact_types=True)
 
 
 def check_predicate(errorType, msg):
     def decorator(func):
+        @functools.wraps(func)
         def wrapper(self, *args, **kwargs):
             predicate = kwargs.pop('predicate', None)
             ret = func(self, *args, **kwargs)
@@ -76,6 +50,9 @@ def check_predicate(errorType, msg):
 
 
 def wait_for_next_page(driver, prev_url):
+    start = time.perf_counter()
     wait = WebDriverWait(driver, 10)
     wait.until(lambda driver: (driver.current_url != prev_url
                                and driver.execute_script('return document.readyState') == 'complete'))
+    elapsed = time.perf_counter() - start
+    PAGE_LOADS.record(elapsed, driver.current_url)
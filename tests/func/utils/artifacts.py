@@ -0,0 +1,142 @@
+"""
+Collection of the artifacts of the failing tests: a screenshot, the console
+logs of the browser, the DOM of the sidebar and a dump of the extension's
+storage, written into a directory of their own per failure.
+
+Only the WebDriver commands are run by the failing test: the files are
+written by a background thread, through a bounded queue. Their sizes are
+capped, and the collection stops after a number of failures, so that a storm
+of failures does not slow the suite down much further.
+"""
+import json
+import os
+import queue
+import re
+import threading
+import time
+
+from selenium.common.exceptions import WebDriverException
+from selenium.webdriver.common.by import By
+
+from .bmc import SideBarController
+
+
+DEFAULT_ARTIFACTS_DIR = 'build/artifacts'
+MAX_QUEUED_FILES = 32
+MAX_FILE_BYTES = 2 * 1024 * 1024
+MAX_TOTAL_BYTES = 200 * 1024 * 1024
+MAX_FAILURES = 50
+
+
+class ArtifactCollector:
+    def __init__(self, directory=DEFAULT_ARTIFACTS_DIR, max_failures=MAX_FAILURES):
+        self.directory = directory
+        self.max_failures = max_failures
+        self.failures = 0
+        self.written_bytes = 0
+        self.dropped = 0
+        self._queue = queue.Queue(MAX_QUEUED_FILES)
+        self._thread = threading.Thread(target=self._write_files, name='artifacts', daemon=True)
+        self._thread.start()
+
+    def _write_files(self):
+        while True:
+            item = self._queue.get()
+            try:
+                if item is None:
+                    return
+                path, content = item
+                if self.written_bytes + len(content) > MAX_TOTAL_BYTES:
+                    self.dropped += 1
+                    continue
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                with open(path, 'wb') as f:
+                    f.write(content)
+                self.written_bytes += len(content)
+            except OSError as e:
+                print('[Artifacts] Failed to write "{}": {}'.format(item[0], e))
+            finally:
+                self._queue.task_done()
+
+    def _submit(self, path, content):
+        if isinstance(content, str):
+            content = content.encode('utf-8')
+        if len(content) > MAX_FILE_BYTES:
+            if path.endswith('.png'):
+                self.dropped += 1
+                return
+            # Keep the end of the text, which is the closest to the failure
+            content = b'[truncated]\n' + content[-MAX_FILE_BYTES:]
+        try:
+            self._queue.put_nowait((path, content))
+        except queue.Full:
+            self.dropped += 1
+
+    def test_directory(self, nodeid):
+        """
+            Returns a unique directory for the artifacts of a failure of the
+            test, even when retried or run by several pytest-xdist workers.
+        """
+        name = re.sub(r'[^A-Za-z0-9_.-]+', '_', nodeid).strip('_')[-120:]
+        return os.path.join(self.directory, '{}-{}-{}-{}'.format(
+            name, os.environ.get('PYTEST_XDIST_WORKER', 'main'),
+            time.strftime('%Y%m%d-%H%M%S'), self.failures))
+
+    def collect(self, nodeid, controller, error):
+        """
+            Collects the artifacts of a failing test, and returns the
+            directory they are written into (or None once `max_failures`
+            failures were collected).
+        """
+        if self.failures >= self.max_failures:
+            return None
+        self.failures += 1
+        directory = self.test_directory(nodeid)
+        driver = controller.driver
+
+        def capture(name, func):
+            try:
+                content = func()
+            except (WebDriverException, AssertionError) as e:
+                content = 'Failed to capture the {}: {}\n'.format(name, e)
+                name += '.error.txt'
+            if content is not None:
+                self._submit(os.path.join(directory, name), content)
+
+        capture('info.txt', lambda: 'test: {}\nurl: {}\n\n{}\n'.format(
+            nodeid, driver.current_url, error))
+        capture('screenshot.png', driver.get_screenshot_as_png)
+        capture('console.log', lambda: '\n'.join(
+            str(line) for line in controller.wrapped_driver.read_console_logs()))
+        capture('sidebar.html', lambda: self._sidebar_html(driver))
+        # Last, as the storage is accessed from a page of the extension
+        capture('storage.json', lambda: json.dumps(
+            controller.wrapped_driver.snapshot_storage(), indent=2))
+        return directory
+
+    @staticmethod
+    def _sidebar_html(driver):
+        # Without waiting for the sidebar, which may not be there at all
+        frames = driver.find_elements(by=By.ID, value=SideBarController.SIDEPANEL_ID)
+        if len(frames) == 0:
+            return None
+        driver.switch_to.frame(frames[0])
+        try:
+            return driver.execute_script('return document.documentElement.outerHTML;')
+        finally:
+            driver.switch_to.parent_frame()
+
+    def close(self, timeout=30):
+        """
+            Waits for the queued files to be written (up to `timeout` seconds),
+            and stops the background thread.
+        """
+        try:
+            self._queue.put(None, timeout=timeout)
+        except queue.Full:
+            pass
+        self._thread.join(timeout)
+        if self.failures > 0:
+            print('[Artifacts] {} failures collected into "{}" ({:.1f} MB, {} files dropped)'
+                  .format(self.failures, self.directory, self.written_bytes / 1024 / 1024,
+                          self.dropped))
@@ -0,0 +1,192 @@
+"""
+Resource policies of the browsers: the requests of the reader pages which the
+tests do not need (scan images, media, ads and trackers) are blocked, so that
+the pages load faster.
+
+Chrome blocks them itself, through the DevTools protocol, while Firefox goes
+through the local proxy of replay.py, which answers them with an error. The
+time spent loading pages is reported per test, along with the time saved
+against the unblocked loads of the same hosts, as recorded by the last session
+run with the "none" policy.
+"""
+import json
+import os
+import re
+import time
+from urllib.parse import urlsplit
+
+
+POLICIES = ['none', 'ads', 'media', 'all']
+# Blocking is opt-in, as Firefox then goes through the proxy of replay.py
+DEFAULT_POLICY = 'none'
+# The page loads per host of the last session of every policy
+DEFAULT_BASELINE_PATH = 'build/page-loads.json'
+MEDIA_EXTENSIONS = ['jpg', 'jpeg', 'png', 'gif', 'webp', 'avif', 'bmp',
+                    'mp4', 'webm', 'ogg', 'mp3', 'm3u8']
+AD_HOSTS = ['doubleclick.net', 'googlesyndication.com', 'googleadservices.com',
+            'google-analytics.com', 'googletagmanager.com', 'googletagservices.com',
+            'adservice.google.com', 'amazon-adsystem.com', 'adnxs.com', 'criteo.com',
+            'criteo.net', 'taboola.com', 'outbrain.com', 'pubmatic.com', 'rubiconproject.com',
+            'openx.net', 'casalemedia.com', 'quantserve.com', 'scorecardresearch.com',
+            'moatads.com', 'popads.net', 'propellerads.com', 'mgid.com', 'exoclick.com',
+            'facebook.net', 'hotjar.com']
+
+
+def blocked_patterns(policy):
+    """
+        Returns the URL patterns blocked by the policy, where `*` matches any
+        string (as expected by Chrome's Network.setBlockedURLs). Only the
+        http(s) URLs are matched, so that the extension's own files are never
+        blocked.
+    """
+    if policy not in POLICIES:
+        raise ValueError('Unknown resource policy "{}"'.format(policy))
+    patterns = []
+    if policy in ('ads', 'all'):
+        for host in AD_HOSTS:
+            patterns += ['http*://{}/*'.format(host), 'http*://*.{}/*'.format(host)]
+    if policy in ('media', 'all'):
+        for extension in MEDIA_EXTENSIONS:
+            patterns += ['http*://*.{}'.format(extension), 'http*://*.{}?*'.format(extension)]
+    return patterns
+
+
+def url_matcher(patterns):
+    """
+        Returns a compiled regex matching the URLs blocked by the patterns, or
+        None when there is none. As for Chrome, a pattern must match the
+        whole URL.
+    """
+    if len(patterns) == 0:
+        return None
+    return re.compile('(?:{})\\Z'.format('|'.join(
+        '(?:{})'.format('.*'.join(re.escape(part) for part in pattern.split('*')))
+        for pattern in patterns)), re.IGNORECASE)
+
+
+class PageLoads:
+    """
+        Session-level record of the time spent waiting for pages to load, per
+        test and per host.
+    """
+
+    def __init__(self, baseline_path=DEFAULT_BASELINE_PATH):
+        self.policy = DEFAULT_POLICY
+        self.baseline_path = baseline_path
+        self.current_test = None
+        self.tests = {}
+        self.hosts = {}
+
+    def record(self, seconds, url=None):
+        count, total = self.tests.get(self.current_test, (0, 0.0))
+        self.tests[self.current_test] = (count + 1, total + seconds)
+        host = urlsplit(url).hostname if url else None
+        if host:
+            count, total = self.hosts.get(host, (0, 0.0))
+            self.hosts[host] = (count + 1, total + seconds)
+
+    def wrap(self, driver):
+        """
+            Times the page loads of the driver (the `get` commands, which wait
+            for the load event).
+        """
+        execute = driver.execute
+
+        def timed_execute(command, params=None):
+            if command != 'get':
+                return execute(command, params)
+            start = time.perf_counter()
+            try:
+                return execute(command, params)
+            finally:
+                self.record(time.perf_counter() - start, (params or {}).get('url'))
+        driver.execute = timed_execute
+        return driver
+
+    def dump(self):
+        """
+            Returns the page loads as JSON-serializable data, for `merge`.
+        """
+        return {'tests': [[test, count, total] for test, (count, total) in self.tests.items()],
+                'hosts': [[host, count, total] for host, (count, total) in self.hosts.items()]}
+
+    def merge(self, data):
+        """
+            Adds the page loads dumped by another record, such as the one of a
+            pytest-xdist worker.
+        """
+        for key, loads in (('tests', self.tests), ('hosts', self.hosts)):
+            for name, count, total in data[key]:
+                previous_count, previous_total = loads.get(name, (0, 0.0))
+                loads[name] = (previous_count + count, previous_total + total)
+
+    def _read_baselines(self):
+        try:
+            with open(self.baseline_path, 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def save(self):
+        """
+            Stores the page loads per host of the session under its policy,
+            for the next sessions to compare with.
+        """
+        if len(self.hosts) == 0:
+            return
+        baselines = self._read_baselines()
+        baselines.setdefault(self.policy, {}).update(
+            {host: list(loads) for host, loads in self.hosts.items()})
+        try:
+            os.makedirs(os.path.dirname(self.baseline_path) or '.', exist_ok=True)
+            tmp_path = '{}.{}.tmp'.format(self.baseline_path, os.getpid())
+            with open(tmp_path, 'w') as f:
+                json.dump(baselines, f, indent=2, sort_keys=True)
+            os.replace(tmp_path, self.baseline_path)
+        except OSError as e:
+            print('Failed to write "{}": {}'.format(self.baseline_path, e))
+
+    def saved_lines(self):
+        """
+            Returns the lines reporting the time saved against the unblocked
+            loads of the same hosts.
+        """
+        if self.policy == 'none':
+            return ['Unblocked page loads stored into "{}", to compare the other policies with'
+                    .format(self.baseline_path)]
+        baseline = self._read_baselines().get('none', {})
+        hosts = []
+        for host, (count, total) in self.hosts.items():
+            if host in baseline:
+                base_count, base_total = baseline[host]
+                unblocked = count * base_total / base_count
+                hosts.append((host, count, unblocked - total, unblocked))
+        if len(hosts) == 0:
+            return ['No unblocked page load of these hosts to compare with: run the tests with '
+                    '"--block none" once to store them into "{}"'.format(self.baseline_path)]
+        saved = sum(saved for _, _, saved, _ in hosts)
+        unblocked = sum(unblocked for _, _, _, unblocked in hosts)
+        lines = ['{:.1f}s saved ({:.0f}%) against the unblocked loads of the same hosts'
+                 .format(saved, 100 * saved / unblocked)]
+        for host, count, saved, unblocked in sorted(hosts, key=lambda h: -h[2]):
+            lines.append('  {:>7.1f}s saved {:>4} loads  {} ({:.2f}s on average instead of {:.2f}s)'
+                         .format(saved, count, host, (unblocked - saved) / count,
+                                 unblocked / count))
+        return lines
+
+    def lines(self, top=10):
+        if len(self.tests) == 0:
+            return ['No page load']
+        count = sum(count for count, _ in self.tests.values())
+        total = sum(total for _, total in self.tests.values())
+        lines = ['{} page loads in {:.1f}s ({:.2f}s on average) with the "{}" resource policy'
+                 .format(count, total, total / count, self.policy)]
+        for test, (count, total) in sorted(self.tests.items(), key=lambda t: -t[1][1])[:top]:
+            lines.append('  {:>7.1f}s {:>4} loads  {}'.format(
+                total, count, test or '<outside of tests>'))
+        if len(self.hosts) > 0:
+            lines += self.saved_lines()
+        return lines
+
+
+PAGE_LOADS = PageLoads()
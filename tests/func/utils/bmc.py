@@ -2,20 +2,132 @@ from selenium.webdriver.common.action_chains import ActionChains
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.support.ui import WebDriverWait
-from selenium.common.exceptions import NoSuchElementException
+from selenium.common.exceptions import (NoSuchElementException, NoSuchFrameException,
+                                        StaleElementReferenceException)
+
+from . import drivers
+from . import waits
+from .waits import wait_until
 
 
 class FrameFocus:
-    def __init__(self, driver, frame):
+    """
+        Reentrant context manager focusing the driver on a frame of the page.
+
+        Only the outermost `with` switches frames: nested ones are no-ops, so
+        helpers can focus the frame whether or not their caller already did.
+        The frame's element is cached until it goes stale, and is then located
+        again with `locator`.
+    """
+
+    def __init__(self, driver, locator, frame=None):
         self._driver = driver
+        self._locator = locator
         self._frame = frame
+        self._depth = 0
+
+    @property
+    def frame(self):
+        return self._frame
+
+    def _switch(self):
+        if self._frame is not None:
+            try:
+                self._driver.switch_to.frame(self._frame)
+                return
+            except (NoSuchElementException, NoSuchFrameException,
+                    StaleElementReferenceException):
+                self._frame = None
+        self._frame = WebDriverWait(self._driver, 30).until(
+            EC.presence_of_element_located(self._locator))
+        self._driver.switch_to.frame(self._frame)
 
     def __enter__(self):
-        WebDriverWait(self._driver, 30).until(
-            EC.frame_to_be_available_and_switch_to_it(self._frame))
+        if self._depth == 0:
+            self._switch()
+        self._depth += 1
+        return self
 
     def __exit__(self, type, value, traceback):
-        self._driver.switch_to.parent_frame()
+        self._depth -= 1
+        if self._depth == 0:
+            self._driver.switch_to.parent_frame()
+
+
+# Returns the whole state of the sidebar in a single round trip, or null when
+# its document is not loaded yet. Must be run within the sidebar's frame.
+SNAPSHOT_SCRIPT = """
+function displayed(elm) {
+    return !!elm && window.getComputedStyle(elm).visibility !== 'hidden'
+        && elm.getClientRects().length > 0;
+}
+var panel = document.getElementById('side-panel');
+var adder = document.getElementById('side-panel-adder');
+if (!panel || !adder) {
+    return null;
+}
+var error = document.querySelector('#side-panel-adder > #error-display');
+var hideBut = document.getElementById('hide-but');
+var items = document.querySelectorAll('#manga-list .mangaListItem');
+return {
+    panel_displayed: displayed(panel),
+    adder_displayed: displayed(adder),
+    hide_button: hideBut.textContent,
+    notified: hideBut.classList.contains('notif-transform'),
+    error_display: window.getComputedStyle(error).display,
+    error_text: error.textContent,
+    comics: Array.prototype.map.call(items, function(item) {
+        var label = item.querySelector('.label-container > .label.rollingArrow');
+        return {
+            element: item,
+            id: (label.bmcData || {}).id,
+            label: label.textContent,
+            folded: !label.classList.contains('rollingArrow-down'),
+            readable: label.parentElement.classList.contains('readable'),
+            sources: Array.prototype.map.call(
+                item.querySelectorAll('.nested > .label-container'), function(source) {
+                    var srcLabel = source.querySelector('.label');
+                    var data = srcLabel.bmcData || {};
+                    return {
+                        element: source,
+                        reader: data.reader,
+                        name: data.name,
+                        readable: source.classList.contains('readable'),
+                    };
+                }),
+        };
+    }),
+};
+"""
+
+
+class SideBarSnapshot:
+    """
+        State of the sidebar at a given time, as returned by SNAPSHOT_SCRIPT:
+        the registered comics (with their sources) are JSON-like dicts, which
+        also hold their DOM elements to interact with them.
+    """
+
+    def __init__(self, data):
+        self.data = data
+
+    @property
+    def hidden(self):
+        return not (self.data['panel_displayed'] or self.data['adder_displayed'])
+
+    @property
+    def error(self):
+        """
+            The text of the registration error, or None when it is not
+            displayed.
+        """
+        if self.data['error_display'] == 'block' and self.data['error_text'] != '':
+            return self.data['error_text']
+        return None
+
+    @property
+    def comics(self):
+        return self.data['comics']
 
 
 class ItemSource:
@@ -23,12 +135,26 @@ class ItemSource:
         Represents a registered Comic's source in the DOM.
         This class provide utilities to manipulate and check sources.
     """
-    def __init__(self, sidepanel, dom_element):
+    def __init__(self, sidepanel, data):
         self._panel = sidepanel
-        self._dom = dom_element
+        self._data = data
+        self._dom = data['element']
+
+    @property
+    def reader(self):
+        return self._data['reader']
+
+    @property
+    def name(self):
+        return self._data['name']
+
+    @property
+    def readable(self):
+        return self._data['readable']
 
     def click(self):
-        self._dom.find_element(by=By.CSS_SELECTOR, value='.label').click()
+        with self._panel.focus():
+            self._dom.find_element(by=By.CSS_SELECTOR, value='.label').click()
 
     def delete(self):
         with self._panel.focus():
@@ -44,34 +170,33 @@ class RegisteredItem:
     """
         Represents and allows to control a registered manga/comic in the
         SidePanel
+
+        Its properties come from the snapshot of the sidebar it was built
+        from, so reading them costs no WebDriver command.
     """
 
-    def __init__(self, sidepanel, dom_element):
+    def __init__(self, sidepanel, data):
         self._panel = sidepanel
-        self._dom = dom_element
-        self._name = None
+        self._data = data
+        self._dom = data['element']
         self._sources = None
 
     @property
     def sources(self):
+        """ Returns a list of ItemSource for the RegisteredItem """
         if self._sources is None:
-            with self._panel.focus():
-                self._sources = self._list_sources_nofocus()
+            if self.folded:
+                self.toggle()
+            self._sources = [ItemSource(self._panel, source) for source in self._data['sources']]
         return self._sources
 
     @property
     def name(self):
-        if self._name is None:
-            with self._panel.focus():
-                self._name = self._dom.find_element(by=By.CSS_SELECTOR, value='.label-container > .label.rollingArrow').text
-        return self._name
+        return self._data['label']
 
-    def _list_sources_nofocus(self):
-        """ Returns a list of ItemSource for the RegisteredItem """
-        if self.folded:
-            self.toggle()
-        items = self._dom.find_elements(by=By.CSS_SELECTOR, value='.nested > .label-container')
-        return [ItemSource(self._panel, item) for item in items]
+    @property
+    def readable(self):
+        return self._data['readable']
 
     def delete(self):
         """
@@ -93,20 +218,21 @@ class RegisteredItem:
             Return a boolean telling whether the RegisteredItem's sources are
             unrolled of rolled-up
         """
-        fold_marker = self._dom.find_element(by=By.CSS_SELECTOR, value='.label-container > .label.rollingArrow')
-        return "rollingArrow-down" not in fold_marker.get_attribute("class")
+        return self._data['folded']
 
     def toggle(self):
         """
             Unrolls (unfold) or Rolls (fold) all the sources for the
             RegisteredItem, effectively showing/hiding them.
         """
-        fold_marker = self._dom.find_element(by=By.CSS_SELECTOR, value='.label-container > .label.rollingArrow')
-        fold_marker.click()
+        with self._panel.focus():
+            fold_marker = self._dom.find_element(by=By.CSS_SELECTOR, value='.label-container > .label.rollingArrow')
+            fold_marker.click()
+        self._data['folded'] = not self._data['folded']
 
     def wait_for_removal(self, timeout=10):
         with self._panel.focus():
-            WebDriverWait(self._panel._driver, timeout).until(EC.staleness_of(self._dom))
+            wait_until(self._panel._driver, waits.stale(self._dom), timeout)
 
 class SideBarController:
     SIDEPANEL_ID = 'BmcSidePanel'
@@ -116,7 +242,8 @@ class SideBarController:
         def finder(driver):
             return driver.find_element(by=By.ID, value=self.SIDEPANEL_ID)
         WebDriverWait(self._driver, 10).until(finder)
-        self._frame = finder(self._driver)
+        self._focus = FrameFocus(self._driver, (By.ID, self.SIDEPANEL_ID),
+                                 finder(self._driver))
 
     @property
     def loaded(self):
@@ -125,7 +252,7 @@ class SideBarController:
             the page. This one marker that the extension was properly
             loaded.
         """
-        return not (self._frame is None)
+        return not (self._focus.frame is None)
 
     @property
     def size(self):
@@ -134,91 +261,77 @@ class SideBarController:
 
             Returns a dict containing "height" and "width" keys
         """
-        return self._frame.size
+        return self._focus.frame.size
 
     @property
     def hidden(self):
-        ret = False
-        with FrameFocus(self._driver, self._frame):
-            WebDriverWait(self._driver, 10).until(
-                lambda driver:
-                driver.find_element(by=By.ID, value='side-panel'))
-            mode_std = \
-                self._driver.find_element(by=By.ID, value='side-panel')
-            WebDriverWait(self._driver, 10).until(
-                lambda driver:
-                driver.find_element(by=By.ID, value='side-panel-adder'))
-            mode_adder = \
-                self._driver.find_element(by=By.ID, value='side-panel-adder')
-            ret = not (mode_std.is_displayed() or mode_adder.is_displayed())
-        return ret
+        return self.snapshot().hidden
+
+    def snapshot(self):
+        """
+            Returns a SideBarSnapshot of the current state of the sidebar,
+            retrieved with a single script execution (once its document is
+            loaded).
+        """
+        with self.focus():
+            data = WebDriverWait(self._driver, 10).until(
+                lambda driver: driver.execute_script(SNAPSHOT_SCRIPT))
+        return SideBarSnapshot(data)
 
     def focus(self):
         """
-            Returns a FrameFocus object to be used as a ContextManager.
+            Returns the FrameFocus of the sidebar, to be used as a
+            ContextManager.
 
             This allows hiding the internal properties of the sidebar, while
             allowing to force the driver to focus on its frame, so that its
-            contents can be inspected by the calling code.
+            contents can be inspected by the calling code. All the methods of
+            the sidebar can be called within this context.
         """
-        return FrameFocus(self._driver, self._frame)
+        return self._focus
 
     def toggle(self):
-        with FrameFocus(self._driver, self._frame):
+        with self.focus():
             togbtn = self._driver.find_element(by=By.ID, value='hide-but')
             txt = togbtn.text
-            WebDriverWait(self._driver, 10).until(EC.element_to_be_clickable)
             togbtn.click()
-            if txt == '>':
-                WebDriverWait(self._driver, 10).until(
-                    lambda driver:
-                    driver.find_element(
-                        by=By.ID, value='hide-but').text == '<')
-            elif txt == '<':
-                WebDriverWait(self._driver, 10).until(
-                    lambda driver:
-                    driver.find_element(
-                        by=By.ID, value='hide-but').text == '>')
+            if txt in ('>', '<'):
+                wait_until(self._driver,
+                           waits.has_text('#hide-but', '<' if txt == '>' else '>', exact=True))
 
     def wait_for_text(self, expected_text, elem_id, timeout=10):
-        with FrameFocus(self._driver, self._frame):
-            wait = WebDriverWait(self._driver, timeout)
-            wait.until(EC.text_to_be_present_in_element((By.ID, elem_id), expected_text))
+        with self.focus():
+            wait_until(self._driver, waits.has_text('#' + elem_id, expected_text), timeout)
 
-    def start_registration_nofocus(self):
+    def start_registration(self):
         """
             This function starts the registration process by clicking on the
             "+" button, and waiting to ensure that the SideBar is properly
             displayed with the right mode.
-
-            Must be called within a FrameFocus's context.
-        """
-        add_btn = self._driver.find_element(by=By.ID, value='register-but')
-        WebDriverWait(self._driver, 10).until(
-            lambda driver: add_btn.is_displayed())
-        # Ensure that we can click on it.
-        assert add_btn.is_enabled() and add_btn.is_displayed()
-        add_btn.click()
-
-        try:
-            WebDriverWait(self._driver, 5).until(
-                lambda driver: driver.find_element(
-                    by=By.CSS_SELECTOR, value='#side-panel-adder > #bookmark-name').is_displayed())
-        except:
-            # Maybe the click failed for whatever reason? Let's retry...
+        """
+        with self.focus():
+            add_btn = self._driver.find_element(by=By.ID, value='register-but')
+            wait_until(self._driver, waits.displayed(add_btn))
+            # Ensure that we can click on it.
+            assert add_btn.is_enabled() and add_btn.is_displayed()
             add_btn.click()
-            WebDriverWait(self._driver, 5).until(
-                lambda driver: driver.find_element(
-                    by=By.CSS_SELECTOR, value='#side-panel-adder > #bookmark-name').is_displayed())
-        elem = self._driver.find_element(by=By.CSS_SELECTOR, value='#side-panel-adder > #bookmark-name')
-        assert elem.is_displayed()
 
-    def wait_for_sidepanel_visible_nofocus(self):
+            name_displayed = waits.displayed('#side-panel-adder > #bookmark-name')
+            try:
+                wait_until(self._driver, name_displayed, 5)
+            except:
+                # Maybe the click failed for whatever reason? Let's retry...
+                add_btn.click()
+                wait_until(self._driver, name_displayed, 5)
+            elem = self._driver.find_element(by=By.CSS_SELECTOR, value='#side-panel-adder > #bookmark-name')
+            assert elem.is_displayed()
+
+    def wait_for_sidepanel_visible(self):
         # Wait for the side-panel to be visible again.
         # The code ensures that it should be shown only after the manga-list
         # has been completely re-generated.
-        WebDriverWait(self._driver, 10).until(
-            EC.visibility_of_element_located((By.ID, 'side-panel')))
+        with self.focus():
+            wait_until(self._driver, waits.displayed('#side-panel'))
 
     def register(self, display_name, expect_failure=False):
         """
@@ -228,8 +341,8 @@ class SideBarController:
             souce to an existing entry, and only attmepts to create a new
             entry.
         """
-        with FrameFocus(self._driver, self._frame):
-            self.start_registration_nofocus()
+        with self.focus():
+            self.start_registration()
             input_field = self._driver.find_element(
                 by=By.CSS_SELECTOR, value='#side-panel-adder > #bookmark-name')
             input_field.clear()
@@ -238,46 +351,33 @@ class SideBarController:
                 by=By.CSS_SELECTOR, value='#side-panel-adder > #add-confirm.button-add')
             cfrm_btn.click()
             if not expect_failure:
-                self.wait_for_sidepanel_visible_nofocus()
-                def registered_entry_available(driver):
-                    elms = driver.find_elements(by=By.CSS_SELECTOR, value='.label.rollingArrow')
-                    for elm in elms:
-                        if elm.text == display_name:
-                            return True
-                    return False
-                WebDriverWait(self._driver, 10).until(registered_entry_available)
+                # The side-panel is shown again once the list is re-generated
+                wait_until(self._driver, [
+                    waits.displayed('#side-panel'),
+                    waits.has_text('.label.rollingArrow', display_name, exact=True),
+                ])
 
     def check_registration_error(self, do_wait=True):
         """
             Asserts whether the error display shows an error
         """
-        with FrameFocus(self._driver, self._frame):
-            disp = self._driver.find_element(
-                by=By.CSS_SELECTOR, value='#side-panel-adder > #error-display')
+        with self.focus():
             if do_wait is False:
-                assert disp.value_of_css_property('display') == 'none'
+                assert self.snapshot().data['error_display'] == 'none'
             else:
-                def validator(driver):
-                    elm = driver.find_element(
-                            by=By.CSS_SELECTOR, value='#side-panel-adder > #error-display')
-                    return (elm.value_of_css_property('display') == 'block'
-                            and elm.text != '')
-                WebDriverWait(self._driver, 10).until(validator)
+                error_display = '#side-panel-adder > #error-display'
+                wait_until(self._driver, [waits.css(error_display, 'display', 'block'),
+                                          waits.has_text(error_display)])
 
     def get_registered(self):
         """
             Returns a list of RegisteredItems from the current content of the
             SidePanel
         """
-        with FrameFocus(self._driver, self._frame):
-            items = []
-            try:
-                self.wait_for_sidepanel_visible_nofocus()
-                items = self._driver.find_elements(
-                    by=By.CSS_SELECTOR, value='#manga-list .mangaListItem')
-            except NoSuchElementException:
-                pass
-        return [RegisteredItem(self, i) for i in items]
+        with self.focus():
+            self.wait_for_sidepanel_visible()
+            snapshot = self.snapshot()
+        return [RegisteredItem(self, comic) for comic in snapshot.comics]
 
     def load(self, name, wait_for_url_change=True):
         """
@@ -285,14 +385,12 @@ class SideBarController:
             associated comic by clicking on the element.
         """
         prev_url = self._driver.current_url
-        with FrameFocus(self._driver, self._frame):
-            self.wait_for_sidepanel_visible_nofocus()
-            items = self._driver.find_elements(by=By.CSS_SELECTOR, value='#manga-list .mangaListItem')
-            # Need to check text at relative xpath: '.label-container .label .inner_text'
-            selected = [i for i in items if i.find_element(by=By.CSS_SELECTOR, value='.label-container .label').text == name]
+        with self.focus():
+            self.wait_for_sidepanel_visible()
+            selected = [comic for comic in self.snapshot().comics if comic['label'] == name]
             assert len(selected) == 1
             comic = RegisteredItem(self, selected[0])
-            sources = comic._list_sources_nofocus()
+            sources = comic.sources
             assert len(sources) == 1
             sources[0].click()
         if wait_for_url_change:
@@ -305,11 +403,8 @@ class SideBarController:
             -> ie: Can be a Storage operation that completed (alias, delete,
                    register, etc)
         """
-        with FrameFocus(self._driver, self._frame):
-            def toggle_but_is_notif(driver):
-                but = driver.find_element(by=By.ID, value='hide-but')
-                return 'notif-transform' in but.get_attribute('class')
-            WebDriverWait(self._driver, 10).until(toggle_but_is_notif)
+        with self.focus():
+            wait_until(self._driver, waits.has_class('#hide-but', 'notif-transform'))
 
     def reset_notification(self):
         """
@@ -318,17 +413,32 @@ class SideBarController:
             -> ie: Can be a Storage operation that completed (alias, delete,
                    register, etc)
         """
-        with FrameFocus(self._driver, self._frame):
+        with self.focus():
             if self._driver.find_element(by=By.CLASS_NAME, value='notif-transform'):
                 self._driver.execute_script('document.querySelector(".notif-transform").classList.remove("notif-transform")')
 
 
 class BmcController:
+    """
+        Controls the extension in a browser.
+
+        The controller is only a lightweight handle until a test actually uses
+        it: the browser is started (and the extension installed) the first
+        time the underlying webdriver is accessed.
+    """
 
-    def __init__(self, wrapped_webdriver):
-        self._wrapped_driver = wrapped_webdriver
+    def __init__(self, browser):
+        self.browser = browser
+        self._wrapped_driver = None
         self._sidebar = None
 
+    @property
+    def started(self):
+        """
+            Tells whether the browser of the controller was started.
+        """
+        return self._wrapped_driver is not None
+
     @property
     def driver(self):
         """
@@ -345,6 +455,8 @@ class BmcController:
             This enables possible use of common utility methods from the
             wrapper.
         """
+        if self._wrapped_driver is None:
+            self._wrapped_driver = drivers.get_driver(self.browser)
         return self._wrapped_driver
 
     @property
@@ -383,9 +495,24 @@ class BmcController:
             functional tests.
         """
         self.refresh()
-        with self.sidebar.focus():
-            self._wrapped_driver.clear_storage()
+        self.wrapped_driver.clear_storage()
+
+    def snapshot_storage(self):
+        """
+            Returns a snapshot of the stored data, which can be saved as JSON
+            and given to `restore_storage`.
+        """
+        return self.wrapped_driver.snapshot_storage()
+
+    def restore_storage(self, snapshot):
+        """
+            Replaces the stored data with a snapshot, so that a test can start
+            from a preloaded library instead of registering comics through the
+            sidebar. The browser is left on an extension page, so the reader
+            page must be loaded afterwards.
+        """
         self.refresh()
+        self.wrapped_driver.restore_storage(snapshot)
 
 
 def init_sidebar(reader_driver, controller, load_random=True, predicate=None):
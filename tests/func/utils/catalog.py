@@ -0,0 +1,125 @@
+"""
+Catalog of the candidate chapters of every reader, from which `load_random`
+picks the page to load.
+
+The candidates of a reader are listed from its home page once per session, or
+loaded from the on-disk cache as long as it is younger than its TTL. The
+candidates found fit once loaded are marked as validated, so that a
+`load_random` is a single navigation most of the time. The ones found unfit
+(no previous or next page, unsupported URL) are only rejected for the rest of
+the session, as the check may fail on a slow page or a popup.
+"""
+import fcntl
+import json
+import os
+import random
+import time
+
+
+DEFAULT_CATALOG_PATH = 'build/catalog.json'
+# In seconds
+DEFAULT_TTL = 6 * 3600
+
+
+class Catalog:
+    def __init__(self, path=DEFAULT_CATALOG_PATH, ttl=DEFAULT_TTL):
+        self.configure(path, ttl)
+
+    def configure(self, path, ttl=DEFAULT_TTL):
+        """
+            Sets the path of the on-disk cache, and its TTL in seconds (None
+            for a cache which never expires).
+        """
+        self._path = path
+        self._ttl = ttl
+        self._readers = None
+        # Not stored, see the module's docstring
+        self._rejected = {}
+
+    def _read(self):
+        try:
+            with open(self._path, 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _load(self):
+        if self._readers is None:
+            self._readers = self._read()
+
+    @staticmethod
+    def _merge(entry, stored):
+        """
+            Merges the entry of a reader stored by another process into ours:
+            the most recent list of candidates wins, and the candidates
+            validated by both are kept.
+        """
+        if stored.get('built', 0) > entry['built']:
+            entry['built'] = stored['built']
+            entry['candidates'] = stored.get('candidates', [])
+        entry['validated'] += [url for url in stored.get('validated', [])
+                               if url not in entry['validated']]
+
+    def _save(self):
+        # Several pytest-xdist workers share the file: the entries they stored
+        # since it was loaded are merged under a lock, and it is replaced
+        # atomically.
+        os.makedirs(os.path.dirname(self._path) or '.', exist_ok=True)
+        with open('{}.lock'.format(self._path), 'w') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            for reader, stored in self._read().items():
+                if reader in self._readers:
+                    self._merge(self._readers[reader], stored)
+                else:
+                    self._readers[reader] = stored
+            tmp_path = '{}.{}.tmp'.format(self._path, os.getpid())
+            with open(tmp_path, 'w') as f:
+                json.dump(self._readers, f, indent=2, sort_keys=True)
+            os.replace(tmp_path, self._path)
+
+    def _entry(self, reader, list_candidates):
+        self._load()
+        entry = self._readers.get(reader)
+        expired = (entry is not None and self._ttl is not None
+                   and time.time() - entry['built'] > self._ttl)
+        if entry is None or expired or len(self.candidates(reader)) == 0:
+            entry = {
+                'built': time.time(),
+                # Sorted, for the seeded random choices to be reproducible
+                'candidates': sorted(set(list_candidates())),
+                'validated': [],
+            }
+            self._readers[reader] = entry
+            self._save()
+        return entry
+
+    def candidates(self, reader):
+        entry = self._readers.get(reader, {})
+        rejected = self._rejected.get(reader, set())
+        return [url for url in entry.get('candidates', []) if url not in rejected]
+
+    def pick(self, reader, list_candidates):
+        """
+            Returns a random candidate of the reader (None if there is none
+            left), listing them with `list_candidates` when they are not known
+            yet.
+        """
+        self._entry(reader, list_candidates)
+        candidates = self.candidates(reader)
+        if len(candidates) == 0:
+            return None
+        return random.choice(candidates)
+
+    def is_validated(self, reader, url):
+        return url in self._readers[reader]['validated']
+
+    def validate(self, reader, url):
+        if not self.is_validated(reader, url):
+            self._readers[reader]['validated'].append(url)
+            self._save()
+
+    def reject(self, reader, url):
+        self._rejected.setdefault(reader, set()).add(url)
+
+
+CATALOG = Catalog()
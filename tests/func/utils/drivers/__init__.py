@@ -1,14 +1,37 @@
+import time
+
+from ..blocking import PAGE_LOADS
 from ..extension import Extension
 
 from . import firefox, chrome
 
 
 WD_WRAPPERS = {}
+# Options passed to every wrapper created (see `configure`)
+WD_OPTIONS = {}
+# Records the commands of the drivers created from now on (see `configure`)
+PROFILER = None
+
+
+def configure(profiler=None, **options):
+    """
+        Sets options of the wrappers created from now on, such as `proxy`
+        (the "host:port" of an HTTP proxy the browsers must go through), and
+        the `profiler` (a CommandProfiler) recording the commands of their
+        drivers.
+    """
+    global PROFILER
+    if profiler is not None:
+        PROFILER = profiler
+    WD_OPTIONS.update(options)
 
 
 def release():
-    for wrapper in WD_WRAPPERS.values():
+    for name, wrapper in WD_WRAPPERS.items():
+        start = time.perf_counter()
         wrapper.release()
+        print('[{}] Browser shut down in {:.2f}s'.format(name, time.perf_counter() - start))
+    WD_WRAPPERS.clear()
 
 
 def get_driver(name):
@@ -19,7 +42,12 @@ def get_driver(name):
     wrapper = WD_WRAPPERS.get(name, None)
 
     if not wrapper:
-        WD_WRAPPERS[name] = wrappers[name](Extension())
+        start = time.perf_counter()
+        WD_WRAPPERS[name] = wrappers[name](Extension(), **WD_OPTIONS)
         wrapper = WD_WRAPPERS[name]
+        PAGE_LOADS.wrap(wrapper.driver)
+        if PROFILER is not None:
+            PROFILER.wrap(wrapper.driver)
+        print('[{}] Browser started in {:.2f}s'.format(name, time.perf_counter() - start))
 
     return wrapper
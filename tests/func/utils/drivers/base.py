@@ -1,11 +1,58 @@
-import json
+import abc
 import os
-from os import path
 
 
-class BaseWebdriverWrapper:
-    def __init__(self, extension):
+def worker_id():
+    """
+        Returns the name of the pytest-xdist worker running the tests ("main"
+        when not running with xdist).
+    """
+    return os.environ.get('PYTEST_XDIST_WORKER', 'main')
+
+
+# Page of the extension in which the storage is accessed: it runs no script,
+# and needs neither a reader page nor the sidebar's iframe.
+STORAGE_PAGE = 'popup.html'
+STORAGE_SCRIPT = """
+var action = arguments[0];
+var snapshot = arguments[1];
+var done = arguments[arguments.length - 1];
+function call(area, method, arg) {
+    return new Promise(function(resolve, reject) {
+        var args = arg === undefined ? [] : [arg];
+        args.push(function(result) {
+            if (chrome.runtime.lastError) {
+                reject(chrome.runtime.lastError.message);
+            } else {
+                resolve(result);
+            }
+        });
+        chrome.storage[area][method].apply(chrome.storage[area], args);
+    });
+}
+Promise.all(['local', 'sync'].map(function(area) {
+    if (action === 'snapshot') {
+        return call(area, 'get', null);
+    }
+    return call(area, 'clear').then(function() {
+        if (action === 'restore') {
+            return call(area, 'set', snapshot[area] || {});
+        }
+    });
+})).then(function(results) {
+    done({local: results[0] || {}, sync: results[1] || {}});
+}).catch(function(err) {
+    done({error: String(err)});
+});
+"""
+
+
+class BaseWebdriverWrapper(abc.ABC):
+    def __init__(self, extension, proxy=None, block='none'):
         self._ext = extension
+        self._proxy = proxy
+        # The policy of the resources to block (see blocking.py)
+        self._block = block
 
     @property
     def driver(self):
@@ -14,6 +61,50 @@ class BaseWebdriverWrapper:
         """
         return self._driver
 
+    @property
+    @abc.abstractmethod
+    def extension_origin(self):
+        """
+            The origin of the extension's pages, such as
+            "chrome-extension://<id>"
+        """
+
+    def _storage(self, action, snapshot=None):
+        url = '{}/{}'.format(self.extension_origin, STORAGE_PAGE)
+        if self._driver.current_url != url:
+            self._driver.get(url)
+        ret = self._driver.execute_async_script(STORAGE_SCRIPT, action, snapshot)
+        assert 'error' not in ret, 'Storage {} failed: {}'.format(action, ret.get('error'))
+        return ret
+
+    def clear_storage(self):
+        """
+            Clears the local & sync storage areas of the extension, from one of
+            its pages (so the browser is left on that page).
+        """
+        self._storage('clear')
+
+    def snapshot_storage(self):
+        """
+            Returns the content of the storage areas of the extension, as a
+            JSON-serializable dict to give to `restore_storage`.
+        """
+        return self._storage('snapshot')
+
+    def restore_storage(self, snapshot):
+        """
+            Replaces the content of the storage areas of the extension with
+            the snapshot.
+        """
+        self._storage('restore', snapshot)
+
+    def read_console_logs(self):
+        """
+            Returns the lines logged in the console of the browser since the
+            previous call.
+        """
+        return []
+
     def release(self):
         """
             This property releases (quits) the underlying webdriver
@@ -1,9 +1,15 @@
+import hashlib
+import shutil
+import tempfile
+
 from selenium import webdriver
 from selenium.webdriver.common.action_chains import ActionChains
 
-from .base import BaseWebdriverWrapper
+from ..blocking import blocked_patterns
+from .base import BaseWebdriverWrapper, worker_id
 
 class Wrapper(BaseWebdriverWrapper):
+    name = 'chrome'
 
     def __init__(self, *args, **kwargs):
         super(Wrapper, self).__init__(*args, **kwargs)
@@ -14,10 +20,41 @@ class Wrapper(BaseWebdriverWrapper):
         options.set_capability('loggingPrefs', {'browser': 'ALL'})
         # Attempt to fix driver.get() getting stuck during tests.
         options.add_argument('--disable-browser-side-navigation')
+        # Every browser instance gets its own profile (and so its own
+        # extension storage), as several ones run at once with xdist. Firefox
+        # always starts from a fresh copy of a profile.
+        self._profile_dir = tempfile.mkdtemp(prefix='bmc-chrome-{}-'.format(worker_id()))
+        options.add_argument('--user-data-dir={}'.format(self._profile_dir))
+        if self._proxy:
+            # The proxy intercepts HTTPS with its own self-signed certificate
+            options.add_argument('--proxy-server=http://{}'.format(self._proxy))
+            options.add_argument('--ignore-certificate-errors')
+            print('[Chrome] Using proxy "{}"'.format(self._proxy))
 
         print('[Chrome] Loading addon from "{}"'.format(self._ext.unpacked_path))
         print('[Chrome] Loading manifest from "{}"'.format(self._ext._manifest_path))
         self._driver = webdriver.Chrome(options=options)
+        patterns = blocked_patterns(self._block)
+        if patterns:
+            self._driver.execute_cdp_cmd('Network.enable', {})
+            self._driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': patterns})
+            print('[Chrome] Blocking the "{}" resources'.format(self._block))
+
+    @property
+    def extension_origin(self):
+        # The ID of an unpacked extension is derived from its path: the first
+        # 32 hex digits of its SHA-256, mapped to the letters 'a' to 'p'.
+        digest = hashlib.sha256(self._ext.unpacked_path.encode('utf-8')).hexdigest()[:32]
+        return 'chrome-extension://{}'.format(
+            ''.join(chr(ord('a') + int(digit, 16)) for digit in digest))
+
+    def release(self):
+        super(Wrapper, self).release()
+        shutil.rmtree(self._profile_dir, ignore_errors=True)
+
+    def read_console_logs(self):
+        # Chrome clears the logs it returns
+        return self._driver.get_log('browser')
 
     def ensure_click(self, element):
         """
@@ -26,14 +63,3 @@ class Wrapper(BaseWebdriverWrapper):
         """
         ActionChains(self._driver).move_to_element(element).perform()
         element.click()
-
-    def clear_storage(self):
-        """
-            Clears local & session storage from the browser
-        """
-        self._driver.execute_script(
-            "(chrome || window.chrome || browser || window.browser)"
-            ".storage.local.clear(()=>{});")
-        self._driver.execute_script(
-            "(chrome || window.chrome || browser || window.browser)"
-            ".storage.sync.clear(()=>{});")
@@ -1,22 +1,88 @@
+import json
+import os
+import tempfile
+import uuid
+
 from selenium import webdriver
+from selenium.webdriver.firefox.service import Service
 
-from .base import BaseWebdriverWrapper
+from ..blocking import blocked_patterns
+from ..replay import ReplayProxy
+from .base import BaseWebdriverWrapper, worker_id
 
 
 class Wrapper(BaseWebdriverWrapper):
+    name = 'firefox'
+
     def __init__(self, *args, **kwargs):
         super(Wrapper, self).__init__(*args, **kwargs)
 
         options = webdriver.FirefoxOptions()
         options.add_argument('-headless')
         options.set_capability('marionette', True)
+        # The internal UUID of an add-on is random unless set beforehand, and
+        # is needed to open the pages of the extension.
+        self._uuid = str(uuid.uuid4())
+        options.set_preference('extensions.webextensions.uuids',
+                               json.dumps({self._ext.addon_id: self._uuid}))
+        # Firefox cannot block URLs by itself: unless it already goes through
+        # the replay proxy (which blocks them too), it gets a proxy of its own
+        # doing it, started along with the browser
+        self._filter_proxy = None
+        proxy = self._proxy
+        patterns = blocked_patterns(self._block)
+        if not proxy and patterns:
+            self._filter_proxy = ReplayProxy('live', blocked=patterns).start()
+            proxy = self._filter_proxy.address
+        if proxy:
+            # The proxy intercepts HTTPS with its own self-signed certificate
+            host, port = proxy.rsplit(':', 1)
+            options.set_preference('network.proxy.type', 1)
+            for scheme in ('http', 'ssl'):
+                options.set_preference('network.proxy.{}'.format(scheme), host)
+                options.set_preference('network.proxy.{}_port'.format(scheme), int(port))
+            options.set_preference('network.proxy.allow_hijacking_localhost', True)
+            options.accept_insecure_certs = True
+            print('[Firefox] Using proxy "{}"'.format(proxy))
+
+        # Geckodriver does not provide the console logs: Firefox prints them
+        # on its output instead, which goes into the log of geckodriver.
+        options.set_preference('devtools.console.stdout.content', True)
+        options.set_preference('devtools.console.stdout.chrome', True)
+        fd, self._log_path = tempfile.mkstemp(
+            prefix='bmc-firefox-{}-'.format(worker_id()), suffix='.log')
+        os.close(fd)
+        self._log_offset = 0
 
-        self._driver = webdriver.Firefox(options=options)
+        try:
+            service = Service(log_output=self._log_path)
+        except TypeError:
+            # Selenium < 4.11 (the last ones supporting python 3.7)
+            service = Service(log_path=self._log_path)
+
+        self._driver = webdriver.Firefox(options=options, service=service)
 
         print('[Firefox] Loading addon from "{}"'.format(self._ext.packed_path))
         print('[Firefox] Loading manifest from "{}"'.format(self._ext._manifest_path))
         self._driver.install_addon(self._ext.packed_path, temporary=True)
 
+    @property
+    def extension_origin(self):
+        return 'moz-extension://{}'.format(self._uuid)
+
+    def read_console_logs(self):
+        with open(self._log_path, 'rb') as f:
+            f.seek(self._log_offset)
+            content = f.read()
+        self._log_offset += len(content)
+        return content.decode('utf-8', 'replace').splitlines()
+
+    def release(self):
+        super(Wrapper, self).release()
+        os.remove(self._log_path)
+        if self._filter_proxy is not None:
+            self._filter_proxy.stop()
+
     def ensure_click(self, element):
         """
             Ensures that the element is clickable (within viewport) then clicks
@@ -27,14 +93,3 @@ class Wrapper(BaseWebdriverWrapper):
         js_scroll_command = 'window.scrollTo({},{});' .format(loc['x'] - wsz['width']/2,
                                                               loc['y'] - wsz['height']/2)
         self._driver.execute_script(js_scroll_command)
-
-    def clear_storage(self):
-        """
-            Clears local & session storage from the browser
-        """
-        self._driver.execute_script(
-            "(chrome || window.chrome || browser || window.browser)"
-            ".storage.local.clear().catch(e=>{}).then(()=>{});")
-        self._driver.execute_script(
-            "(chrome || window.chrome || browser || window.browser)"
-            ".storage.sync.clear().catch(e=>{}).then(()=>{});")
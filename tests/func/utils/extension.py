@@ -29,10 +29,10 @@ class Extension:
 
         # Handle path computation to differentiate CI env
         # (with workspace data) and developer's environment
-        # (build in source dir)
+        # (build in source dir, by `setup.py build`)
         bpath = os.environ.get('WEBEXT_DIR', None)
         if not bpath:
-            bpath = path.join(os.getcwd(), 'build')
+            bpath = path.join(os.getcwd(), 'build', self.browser)
         self._packed_fpath = make_realpath([
             bpath,
             self.archive_name
@@ -53,6 +53,15 @@ class Extension:
     def version(self):
         return self._data['version']
 
+    @property
+    def browser(self):
+        # Only the Firefox manifest holds the add-on's ID
+        return 'firefox' if 'applications' in self._data else 'chrome'
+
+    @property
+    def addon_id(self):
+        return self._data['applications']['gecko']['id']
+
     @property
     def archive_name(self):
         return '{}-{}.zip'.format(self.name, self.version)
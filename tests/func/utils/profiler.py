@@ -0,0 +1,217 @@
+"""
+Profiler of the WebDriver commands sent by the tests.
+
+Every command sent by a driver is recorded along with the test (and the phase
+of the test: setup, call or teardown) and the stack of the test code which
+sent it, so that the slow tests and helpers can be found. The `before_tests`
+reset run by the teardown of every test appears as a fixture of its own.
+
+At the end of the session, it writes a JSON report and a collapsed-stack file
+(the input of flamegraph.pl, speedscope, etc.), and summarizes the slowest
+tests and helpers.
+"""
+import json
+import os
+import sys
+import time
+
+import pytest
+
+
+DEFAULT_PROFILE_DIR = 'build/profile'
+# Only the frames of the test code (and not of selenium or pytest) make the
+# recorded stacks
+TESTS_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))) + os.sep
+# The frames of the decorators of the helpers (`retry`, `retry_on_ex` and
+# `check_predicate`) are left out too, so that their commands are charged to
+# the decorated helper
+UTILS_DIR = os.path.dirname(os.path.abspath(__file__))
+RETRIES_PATH = os.path.join(UTILS_DIR, 'retries.py')
+UTILS_PATH = os.path.join(UTILS_DIR, '__init__.py')
+
+
+def frame_name(frame):
+    code = frame.f_code
+    owner = frame.f_locals.get('self')
+    if owner is not None:
+        return '{}.{}'.format(type(owner).__name__, code.co_name)
+    return code.co_name
+
+
+def is_decorator(code):
+    return (code.co_filename == RETRIES_PATH
+            or (code.co_filename == UTILS_PATH and code.co_name == 'wrapper'))
+
+
+def code_stack(frame):
+    """
+        Returns the names of the frames of the test code in the stack, from
+        the outermost one: the test function or fixture.
+    """
+    stack = []
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if (filename.startswith(TESTS_DIR) and filename != __file__
+                and not is_decorator(frame.f_code)):
+            stack.append(frame_name(frame))
+        frame = frame.f_back
+    stack.reverse()
+    return stack
+
+
+class CommandRecord:
+    def __init__(self, test, phase, stack, command, seconds):
+        self.test = test
+        self.phase = phase
+        self.stack = stack
+        self.command = command
+        self.seconds = seconds
+
+    @property
+    def helper(self):
+        """
+            The helper called by the test or fixture which sent the command
+            (or the test or fixture itself when it sent it directly).
+        """
+        if len(self.stack) == 0:
+            return '<selenium>'
+        return self.stack[1] if len(self.stack) > 1 else self.stack[0]
+
+
+def _totals(records, key):
+    totals = {}
+    for record in records:
+        count, seconds = totals.get(key(record), (0, 0.0))
+        totals[key(record)] = (count + 1, seconds + record.seconds)
+    return sorted(totals.items(), key=lambda t: -t[1][1])
+
+
+class CommandProfiler:
+    """
+        The pytest plugin recording the commands (see `wrap`).
+    """
+
+    def __init__(self, directory=DEFAULT_PROFILE_DIR, top=10):
+        self.directory = directory
+        self.top = top
+        self.records = []
+        self._test = None
+        self._phase = None
+
+    def wrap(self, driver):
+        """
+            Records the commands of the driver: they are all sent through its
+            `execute` method, including the ones of its WebElements.
+        """
+        execute = driver.execute
+
+        def profiled_execute(command, params=None):
+            start = time.perf_counter()
+            try:
+                return execute(command, params)
+            finally:
+                self.records.append(CommandRecord(
+                    self._test, self._phase, code_stack(sys._getframe(1)), command,
+                    time.perf_counter() - start))
+        driver.execute = profiled_execute
+        return driver
+
+    def _run_phase(self, item, phase):
+        self._test = item.nodeid
+        self._phase = phase
+        yield
+        self._test = None
+        self._phase = None
+
+    @pytest.hookimpl(hookwrapper=True)
+    def pytest_runtest_setup(self, item):
+        yield from self._run_phase(item, 'setup')
+
+    @pytest.hookimpl(hookwrapper=True)
+    def pytest_runtest_call(self, item):
+        yield from self._run_phase(item, 'call')
+
+    @pytest.hookimpl(hookwrapper=True)
+    def pytest_runtest_teardown(self, item):
+        yield from self._run_phase(item, 'teardown')
+
+    def dump(self):
+        """
+            Returns the records as JSON-serializable data, for `merge`.
+        """
+        return [[r.test, r.phase, r.stack, r.command, r.seconds] for r in self.records]
+
+    def merge(self, data):
+        """
+            Adds the records dumped by another profiler, such as the one of a
+            pytest-xdist worker.
+        """
+        self.records += [CommandRecord(*record) for record in data]
+
+    def report(self):
+        def entries(key, name):
+            return [{name: value, 'commands': count, 'seconds': round(seconds, 6)}
+                    for value, (count, seconds) in _totals(self.records, key)]
+        fixtures = [r for r in self.records if r.phase in ('setup', 'teardown') and r.stack]
+        tests = {}
+        for record in self.records:
+            phases = tests.setdefault(record.test or '<session>', {})
+            count, seconds = phases.get(record.phase or 'none', (0, 0.0))
+            phases[record.phase or 'none'] = (count + 1, seconds + record.seconds)
+        return {
+            'commands': len(self.records),
+            'seconds': round(sum(r.seconds for r in self.records), 6),
+            'tests': sorted([{
+                'test': test,
+                'commands': sum(count for count, _ in phases.values()),
+                'seconds': round(sum(seconds for _, seconds in phases.values()), 6),
+                'phases': {phase: {'commands': count, 'seconds': round(seconds, 6)}
+                           for phase, (count, seconds) in phases.items()},
+            } for test, phases in tests.items()], key=lambda t: -t['seconds']),
+            'helpers': entries(lambda r: r.helper, 'helper'),
+            'fixtures': [{'fixture': value, 'commands': count, 'seconds': round(seconds, 6)}
+                         for value, (count, seconds) in _totals(fixtures, lambda r: r.stack[0])],
+            'webdriver_commands': entries(lambda r: r.command, 'command'),
+        }
+
+    def collapsed_stacks(self):
+        """
+            Returns the lines of the collapsed stacks, weighted in
+            microseconds.
+        """
+        weights = {}
+        for record in self.records:
+            frames = [record.test or '<session>', record.phase or 'none'] + record.stack
+            stack = ';'.join(frame.replace(';', ',') for frame in frames + [record.command])
+            weights[stack] = weights.get(stack, 0) + record.seconds
+        return ['{} {}'.format(stack, int(seconds * 1000000))
+                for stack, seconds in sorted(weights.items())]
+
+    def write(self):
+        # With pytest-xdist, only the controller writes them, once the records
+        # of the workers are merged
+        os.makedirs(self.directory, exist_ok=True)
+        json_path = os.path.join(self.directory, 'commands.json')
+        with open(json_path, 'w') as f:
+            json.dump(self.report(), f, indent=2)
+        stacks_path = os.path.join(self.directory, 'commands.folded')
+        with open(stacks_path, 'w') as f:
+            f.write(''.join(line + '\n' for line in self.collapsed_stacks()))
+        return json_path, stacks_path
+
+    def pytest_terminal_summary(self, terminalreporter):
+        config = terminalreporter.config
+        if hasattr(config, 'workerinput') or config.option.collectonly or not self.records:
+            return
+        terminalreporter.section('webdriver commands')
+        json_path, stacks_path = self.write()
+        report = self.report()
+        terminalreporter.write_line('{} commands in {:.1f}s, written into {} and {}'.format(
+            report['commands'], report['seconds'], json_path, stacks_path))
+        for title, entries, name in (('tests', report['tests'], 'test'),
+                                     ('helpers', report['helpers'], 'helper'),
+                                     ('fixtures', report['fixtures'], 'fixture')):
+            terminalreporter.write_line('Slowest {}:'.format(title))
+            for entry in entries[:self.top]:
+                terminalreporter.write_line('  {:>7.2f}s {:>5} commands  {}'.format(
+                    entry['seconds'], entry['commands'], entry[name]))
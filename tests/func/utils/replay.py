@@ -0,0 +1,236 @@
+"""
+Record/replay HTTP(S) proxy standing in for the reader websites.
+
+In `record` mode, the requests of the browsers are forwarded to the real
+websites, and their responses are stored on disk. In `replay` mode, the stored
+responses are served instead, so that the tests run without any network
+access. In `live` mode, the requests are only forwarded, for the proxy to
+block the URLs of a resource policy (see blocking.py).
+
+The browsers are configured to go through the proxy (see `drivers.configure`).
+HTTPS requests are intercepted with a self-signed certificate, generated with
+the `openssl` CLI, which the browsers are told to accept.
+"""
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import hashlib
+import http.client
+import json
+import os
+import ssl
+import subprocess
+import sys
+import tempfile
+import threading
+from urllib.parse import urlsplit
+
+from .blocking import url_matcher
+
+
+MODES = ['off', 'record', 'replay']
+DEFAULT_RECORDINGS_DIR = 'build/recordings'
+# Headers which only make sense for a single connection, or which would make
+# the browser bypass the proxy later on.
+DROPPED_HEADERS = {'connection', 'keep-alive', 'proxy-connection', 'proxy-authorization',
+                   'te', 'trailer', 'transfer-encoding', 'upgrade', 'content-length',
+                   'accept-encoding', 'alt-svc', 'strict-transport-security'}
+UPSTREAM_TIMEOUT = 30
+
+
+def make_certificate(directory):
+    """
+    Generates a self-signed certificate (and its key) into the directory, and
+    returns their paths.
+    """
+    cert_path = os.path.join(directory, 'replay-cert.pem')
+    key_path = os.path.join(directory, 'replay-key.pem')
+    subprocess.run(['openssl', 'req', '-x509', '-newkey', 'rsa:2048', '-nodes',
+                    '-keyout', key_path, '-out', cert_path, '-days', '7',
+                    '-subj', '/CN=bookmycomics-replay'],
+                   check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    return cert_path, key_path
+
+
+class Recordings:
+    """
+    Stores the responses on disk, keyed by the request's method, URL and body:
+    `<directory>/<host>/<key>.json` holds the status and headers, and
+    `<key>.body` the body.
+    """
+
+    def __init__(self, directory):
+        self._directory = directory
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = []
+
+    def _paths(self, method, url, body):
+        digest = hashlib.sha1()
+        for part in (method.encode('utf-8'), url.encode('utf-8'), body or b''):
+            digest.update(part + b'\0')
+        base = os.path.join(self._directory, urlsplit(url).netloc.replace(':', '_'),
+                            digest.hexdigest())
+        return base + '.json', base + '.body'
+
+    def load(self, method, url, body):
+        meta_path, body_path = self._paths(method, url, body)
+        try:
+            with open(meta_path, 'r') as f:
+                meta = json.load(f)
+            with open(body_path, 'rb') as f:
+                content = f.read()
+        except OSError:
+            with self._lock:
+                self.misses.append('{} {}'.format(method, url))
+            return None
+        with self._lock:
+            self.hits += 1
+        return meta['status'], meta['headers'], content
+
+    def store(self, method, url, body, status, headers, content):
+        meta_path, body_path = self._paths(method, url, body)
+        os.makedirs(os.path.dirname(meta_path), exist_ok=True)
+        with open(body_path, 'wb') as f:
+            f.write(content)
+        with open(meta_path, 'w') as f:
+            json.dump({'method': method, 'url': url, 'status': status, 'headers': headers}, f,
+                      indent=2)
+
+
+def fetch(method, url, headers, body):
+    """
+    Sends the request to the real website, and returns the status, headers and
+    body of its response (redirections are not followed).
+    """
+    parts = urlsplit(url)
+    if parts.scheme == 'https':
+        connection = http.client.HTTPSConnection(parts.netloc, timeout=UPSTREAM_TIMEOUT)
+    else:
+        connection = http.client.HTTPConnection(parts.netloc, timeout=UPSTREAM_TIMEOUT)
+    path = parts.path or '/'
+    if parts.query:
+        path += '?' + parts.query
+    try:
+        connection.request(method, path, body=body, headers=headers)
+        response = connection.getresponse()
+        content = response.read()
+        return response.status, response.getheaders(), content
+    finally:
+        connection.close()
+
+
+class _ProxyHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # Set for the requests received through a CONNECT tunnel
+    _origin = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_CONNECT(self):
+        self.send_response(200, 'Connection Established')
+        self.end_headers()
+        host, _, port = self.path.partition(':')
+        try:
+            tunnel = self.server.ssl_context.wrap_socket(self.connection, server_side=True)
+        except (ssl.SSLError, OSError):
+            self.close_connection = True
+            return
+        # The following requests are read from the tunnel, by the loop of
+        # BaseHTTPRequestHandler.handle
+        self.connection = tunnel
+        self.rfile = tunnel.makefile('rb', self.rbufsize)
+        self.wfile = tunnel.makefile('wb', self.wbufsize)
+        self._origin = 'https://{}'.format(host if port in ('', '443') else self.path)
+        self.close_connection = False
+
+    def _forward(self):
+        url = self.path if self._origin is None else self._origin + self.path
+        length = int(self.headers.get('Content-Length', 0))
+        body = self.rfile.read(length) if length > 0 else None
+        response = self.server.exchange(self.command, url, self.headers, body)
+        if response is None:
+            status, headers, content = 504, [], 'Not recorded: {}\n'.format(url).encode('utf-8')
+        else:
+            status, headers, content = response
+        self.send_response(status)
+        for name, value in headers:
+            if name.lower() not in DROPPED_HEADERS:
+                self.send_header(name, value)
+        self.send_header('Content-Length', str(len(content)))
+        self.end_headers()
+        if self.command != 'HEAD':
+            self.wfile.write(content)
+
+    do_GET = _forward
+    do_HEAD = _forward
+    do_POST = _forward
+    do_PUT = _forward
+    do_DELETE = _forward
+    do_OPTIONS = _forward
+
+
+class ReplayProxy(ThreadingHTTPServer):
+    """
+    The proxy server, listening on a random port of the loopback interface.
+    Use `start` and `stop` to run it in a background thread.
+
+    The requests matching one of the `blocked` URL patterns are answered with
+    an empty 403 response.
+    """
+    daemon_threads = True
+
+    def __init__(self, mode, directory=DEFAULT_RECORDINGS_DIR, blocked=()):
+        if mode not in ('live', 'record', 'replay'):
+            raise ValueError('Unknown replay mode "{}"'.format(mode))
+        super(ReplayProxy, self).__init__(('127.0.0.1', 0), _ProxyHandler)
+        self.mode = mode
+        self.recordings = Recordings(directory)
+        self._blocked = url_matcher(list(blocked))
+        self._lock = threading.Lock()
+        self.nb_blocked = 0
+        self._tmpdir = tempfile.TemporaryDirectory(prefix='bmc-replay-')
+        self.ssl_context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+        self.ssl_context.load_cert_chain(*make_certificate(self._tmpdir.name))
+        self._thread = None
+
+    @property
+    def address(self):
+        return '{}:{}'.format(*self.server_address[:2])
+
+    def exchange(self, method, url, headers, body):
+        if self._blocked is not None and self._blocked.match(url):
+            with self._lock:
+                self.nb_blocked += 1
+            return 403, [], b''
+        if self.mode == 'replay':
+            return self.recordings.load(method, url, body)
+        headers = [(name, value) for name, value in headers.items()
+                   if name.lower() not in DROPPED_HEADERS]
+        try:
+            response = fetch(method, url, dict(headers), body)
+        except (OSError, http.client.HTTPException) as e:
+            print('[Replay] Failed to fetch {}: {}'.format(url, e), file=sys.stderr)
+            return None
+        status, response_headers, content = response
+        response_headers = [[name, value] for name, value in response_headers
+                            if name.lower() not in DROPPED_HEADERS]
+        if self.mode == 'record':
+            self.recordings.store(method, url, body, status, response_headers, content)
+        return status, response_headers, content
+
+    def start(self):
+        self._thread = threading.Thread(target=self.serve_forever, name='replay-proxy',
+                                        daemon=True)
+        self._thread.start()
+        print('[Replay] Proxy in {} mode listening on {}'.format(self.mode, self.address))
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+        self._tmpdir.cleanup()
+        if self._blocked is not None:
+            print('[Replay] {} requests blocked'.format(self.nb_blocked))
+        if self.mode == 'replay':
+            print('[Replay] {} responses replayed, {} requests not recorded'.format(
+                self.recordings.hits, len(self.recordings.misses)))
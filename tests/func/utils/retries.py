@@ -0,0 +1,149 @@
+import functools
+import random
+import sys
+import time
+
+
+# Jitter has its own generator, so that retrying does not change the random
+# choices of the reader drivers (which are seeded when recording/replaying).
+_JITTER = random.Random()
+
+
+class RetryRecord:
+    def __init__(self, test, helper, cause, message, attempt, lost):
+        self.test = test
+        self.helper = helper
+        self.cause = cause
+        self.message = message
+        self.attempt = attempt
+        self.lost = lost
+
+
+class RetryReport:
+    """
+        Session-level record of all the retries, with the time lost by each
+        of them (the failed attempt plus the backoff delay), so that we can
+        see where the suite's time goes.
+    """
+
+    def __init__(self):
+        self.records = []
+        self.give_ups = 0
+        self.current_test = None
+
+    def record(self, helper, exc, attempt, lost):
+        self.records.append(RetryRecord(self.current_test, helper, type(exc).__name__,
+                                        str(exc).strip().split('\n')[0], attempt, lost))
+
+    def dump(self):
+        """
+            Returns the records as JSON-serializable data, for `merge`.
+        """
+        return {'records': [dict(vars(r)) for r in self.records], 'give_ups': self.give_ups}
+
+    def merge(self, data):
+        """
+            Adds the records dumped by another report, such as the one of a
+            pytest-xdist worker.
+        """
+        self.records += [RetryRecord(**r) for r in data['records']]
+        self.give_ups += data['give_ups']
+
+    def lines(self, top=10):
+        """
+            Returns the lines of the summary of the retries: the time lost per
+            helper and per cause, and the tests which lost the most time.
+        """
+        if len(self.records) == 0:
+            return ['No retry']
+        lines = ['{} retries, {:.1f}s lost, {} gave up'.format(
+            len(self.records), sum(r.lost for r in self.records), self.give_ups)]
+        for title, key in (('helper', lambda r: r.helper), ('cause', lambda r: r.cause),
+                           ('test', lambda r: r.test or '<outside of tests>')):
+            totals = {}
+            for r in self.records:
+                count, lost = totals.get(key(r), (0, 0.0))
+                totals[key(r)] = (count + 1, lost + r.lost)
+            lines.append('Per {}:'.format(title))
+            for name, (count, lost) in sorted(totals.items(), key=lambda t: -t[1][1])[:top]:
+                lines.append('  {:>7.1f}s {:>4} retries  {}'.format(lost, count, name))
+        return lines
+
+
+RETRY_REPORT = RetryReport()
+
+
+class RetryPolicy:
+    """
+        Retries a call raising one of the `retry_on` exceptions (unless it is
+        also one of the `give_up_on` ones), with an exponential backoff and
+        jitter between the attempts. With `exact_types`, the subclasses of the
+        `retry_on` exceptions are not retried.
+
+        It gives up once `max_attempts` attempts failed, or when the next
+        attempt would start after the `deadline` (in seconds, counted from the
+        first attempt). Then, if `abort` is set, an AssertionError is raised,
+        otherwise None is returned.
+    """
+
+    def __init__(self, retry_on, give_up_on=(), max_attempts=5, deadline=60.0,
+                 base_delay=0.25, max_delay=4.0, jitter=0.5, abort=True, exact_types=False):
+        self.retry_on = tuple(retry_on)
+        self.give_up_on = tuple(give_up_on)
+        self.max_attempts = max_attempts
+        self.deadline = deadline
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.jitter = jitter
+        self.abort = abort
+        self.exact_types = exact_types
+
+    def is_retriable(self, exc):
+        if self.exact_types:
+            matches = type(exc) in self.retry_on
+        else:
+            matches = isinstance(exc, self.retry_on)
+        return matches and not isinstance(exc, self.give_up_on)
+
+    def delay(self, attempt):
+        """
+            Returns the delay before the attempt following the `attempt`-th
+            one (starting at 1).
+        """
+        delay = min(self.max_delay, self.base_delay * (2 ** (attempt - 1)))
+        return delay * _JITTER.uniform(1 - self.jitter, 1)
+
+    def call(self, func, *args, **kwargs):
+        helper = getattr(func, '__qualname__', repr(func))
+        start = time.monotonic()
+        attempt = 0
+        while True:
+            attempt += 1
+            attempt_start = time.monotonic()
+            try:
+                return func(*args, **kwargs)
+            except Exception as e:
+                if not self.is_retriable(e):
+                    raise
+                error = e
+            print('[retry] {} attempt {} failed: {}'.format(helper, attempt, error),
+                  file=sys.stderr)
+            delay = self.delay(attempt)
+            now = time.monotonic()
+            if attempt >= self.max_attempts or now + delay - start > self.deadline:
+                RETRY_REPORT.record(helper, error, attempt, now - attempt_start)
+                RETRY_REPORT.give_ups += 1
+                break
+            time.sleep(delay)
+            RETRY_REPORT.record(helper, error, attempt, time.monotonic() - attempt_start)
+
+        if self.abort:
+            raise AssertionError('{} gave up after {} attempts in {:.1f}s: {}'.format(
+                helper, attempt, time.monotonic() - start, error)) from error
+        return None
+
+    def __call__(self, func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            return self.call(func, *args, **kwargs)
+        return wrapper
@@ -1,3 +1,20 @@
+from .. import RetriableError
+from ..catalog import CATALOG
+
+
+# Candidates loaded by a single `load_random` before giving up (and retrying)
+MAX_CANDIDATE_LOADS = 10
+CHAPTER_LINKS_SCRIPT = """
+var itemSelector = arguments[0];
+var linkSelector = arguments[1];
+return Array.prototype.map.call(document.querySelectorAll(itemSelector), function(item) {
+    return Array.prototype.map.call(item.querySelectorAll(linkSelector), function(link) {
+        return link.href;
+    });
+});
+"""
+
+
 class SupportBase:
     name = None
 
@@ -11,6 +28,50 @@ class SupportBase:
     def load_random(self):
         pass
 
+    def list_candidates(self):
+        """
+            Returns the URLs of the chapters `load_random` may load, usually
+            listed from the home page of the reader.
+        """
+        return []
+
+    def check_candidate(self):
+        """
+            Tells whether the loaded candidate chapter can be used by the
+            tests. Any is by default, the readers whose candidates may lack a
+            previous or next page check it.
+        """
+        return True
+
+    def load_candidate(self):
+        """
+            Loads a random candidate chapter from the catalog of the reader.
+
+            A candidate failing `check_candidate` is rejected from the catalog
+            (for the session) and another one is loaded, while a validated one is not checked
+            again.
+        """
+        for _ in range(MAX_CANDIDATE_LOADS):
+            url = CATALOG.pick(self.name, self.list_candidates)
+            if url is None:
+                raise RuntimeError("No manga with enough chapters nor with link on {}"
+                                   .format(self.name))
+            self._driver.get(url)
+            if CATALOG.is_validated(self.name, url) or self.check_candidate():
+                CATALOG.validate(self.name, url)
+                return url
+            print('Rejecting candidate {}'.format(url))
+            CATALOG.reject(self.name, url)
+        raise RetriableError("No fitting candidate among {} loaded on {}"
+                             .format(MAX_CANDIDATE_LOADS, self.name))
+
+    def _chapter_links(self, item_selector, link_selector):
+        """
+            Returns the URLs of the chapter links of every manga listed in the
+            page, with a single script execution.
+        """
+        return self._driver.execute_script(CHAPTER_LINKS_SCRIPT, item_selector, link_selector)
+
     def has_prev_page(self):
         pass
 
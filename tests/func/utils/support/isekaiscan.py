@@ -1,5 +1,3 @@
-import random
-
 from selenium.common.exceptions import NoSuchElementException
 from selenium.webdriver.common.by import By
 from selenium.webdriver.common.action_chains import ActionChains
@@ -22,51 +20,42 @@ class IsekaiScanDriver(SupportBase):
         if rgpd_consent_btn:
             rgpd_consent_btn[0].click()
 
-    def _get_mangas(self):
-        self.home()
-        # Retrieve the generated random link, which is generated after loading the page
-        return self._driver.find_elements(by=By.CSS_SELECTOR, value='.chapter-item')
-
     def _get_sep(self, url):
         return 'ch-' if '/ch-' in url else 'chapter-'
 
-    @retry(abort=True)
-    @check_predicate(RetriableError, "Could not load random comic")
-    def load_random(self):
-        mangas = self._get_mangas()
-        print(f'checking {len(mangas)} mangas...')
+    def list_candidates(self):
+        self.home()
         candidates = []
-        while len(mangas) > 0:
-            manga = mangas.pop(random.randrange(len(mangas)))
-            chapters = manga.find_elements(by=By.CSS_SELECTOR, value='.chapter>a')
-            # Cannot check here that there's 3 chapters since they only display 2
+        # Cannot check here that there's 3 chapters since they only display 2
+        for chapters in self._chapter_links('.chapter-item', '.chapter>a'):
             if len(chapters) < 2:
                 continue
-            candidates.append(chapters[1].get_attribute('href'))
-
-        candidates = candidates[:5]
-        print(f'checking {len(candidates)} candidates...')
-        while len(candidates) > 0:
-            candidate = candidates.pop(random.randrange(len(candidates)))
-            print(f'checking {candidate} ...')
+            candidate = chapters[1]
             # do not test cases where chapter numbering is "broken" and cannot
             # be unified (ex: `chapter-0-2`)
             sep = self._get_sep(candidate)
             if len(candidate.split('/')[-2].split(sep)[1].split('-')) > 1:
                 print(f'Skip: sub-numbering -> {candidate}')
                 continue
-            self._driver.get(candidate)
-            # pass RPGD cookie/tracking agreement button if any, since only
-            # necessary on the first load during a testing session.
-            cookie_ack_btn = self._driver.find_elements(by=By.CSS_SELECTOR, value='#qc-cmp2-ui > div.qc-cmp2-footer.qc-cmp2-footer-overlay.qc-cmp2-footer-scrolled > div > button.sc-ifAKCX.ljEJIv')
-            if cookie_ack_btn:
-                cookie_ack_btn[0].click()
-
-            # Success -> return
-            if self.has_next_page() and self.has_prev_page():
-                return
-
-        raise RuntimeError("No manga with enough chapters nor with link on isekaiscan")
+            candidates.append(candidate)
+        return candidates
+
+    def _ack_cookies(self):
+        # pass RPGD cookie/tracking agreement button if any, since only
+        # necessary on the first load during a testing session.
+        cookie_ack_btn = self._driver.find_elements(by=By.CSS_SELECTOR, value='#qc-cmp2-ui > div.qc-cmp2-footer.qc-cmp2-footer-overlay.qc-cmp2-footer-scrolled > div > button.sc-ifAKCX.ljEJIv')
+        if cookie_ack_btn:
+            cookie_ack_btn[0].click()
+
+    def check_candidate(self):
+        self._ack_cookies()
+        return self.has_next_page() and self.has_prev_page()
+
+    @retry(abort=True)
+    @check_predicate(RetriableError, "Could not load random comic")
+    def load_random(self):
+        self.load_candidate()
+        self._ack_cookies()
 
     def has_prev_page(self):
         if self._driver.find_elements(by=By.CSS_SELECTOR, value='.nav-previous > .prev_page'):
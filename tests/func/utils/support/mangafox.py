@@ -115,67 +115,55 @@ class FanFoxDriver(SupportBase):
             # fine, we only need to handle it once
             pass
 
-    @retry(abort=True)
-    @check_predicate(RetriableError, "Could not load random comic")
-    def load_random(self):
+    def list_candidates(self):
         # First, go to the website
         self.home()
 
         # Select a list of "candidate chapters links" (with the href values,
-        # which prevents invalidating the candidates by loading a new page)
-        mangas = self._driver.find_elements(by=By.CSS_SELECTOR, value='.manga-list-4-list > li')
-        print(f'checking out {len(mangas)} mangas')
-        candidates = []
-        while len(mangas):
-            manga = mangas.pop(random.randrange(len(mangas)))
-            chapters = manga.find_elements(by=By.CSS_SELECTOR, value='.manga-list-4-item-part > li > a')
-            # Guarantee that we take a chapter which has both a "prev" and a "next"
-            if len(chapters) < 3:
-                print('Skipping, not enough chapters')
-                continue
-            candidates.append(chapters[1].get_attribute('href'))
-
-        # Check random candidates until they fit the bill:
+        # which prevents invalidating the candidates by loading a new page).
+        # Guarantee that we take a chapter which has both a "prev" and a "next"
+        return [chapters[1] for chapters in self._chapter_links(
+                    '.manga-list-4-list > li', '.manga-list-4-item-part > li > a')
+                if len(chapters) >= 3]
+
+    def check_candidate(self):
+        # The candidate must fit the bill:
         # - Same website (base url)
         # - Has a navigation bar
-        print(f'checking out {len(candidates)} candidates')
-        while len(candidates):
-            candidate = candidates.pop(random.randrange(len(candidates)))
-            self._driver.get(candidate)
-
-            if self._driver.current_url == 'https://fanfox.net':
-                print('Failed ? Still on homepage')
-                continue
-            print(self._driver.current_url)
-
-            if len(self._driver.current_url.split('/')) != 7:
-                print('Does not support URLS with volume part for now:'
-                      f' {len(self._driver.current_url.split("/"))} parts')
-                continue
-
-            # Now, select a page which has both "next" and "prev" pages (ie:
-            # neither first nor last), but first we need to ensure the DOM has been
-            # properly updated, and that the required select is present (it's added
-            # dynamically)
-            try:
-                pages = self._driver.find_elements(by=By.CSS_SELECTOR, value='div > div > span > a')
-            except NoSuchElementException:
-                print('Failed? No navbar')
-                continue
-
-            if len(pages) <= 2:
-                # This might mean that we're looking at one-page chapters for the
-                # manga. As the reader supports it, let's go with this.
-                self._navbar.update()
-            else:
-                # Only retain half the links (the navigation buttons are present twice
-                # in a page, on top of the scan and underneath it), and click on a
-                # page link which is neither the first nor the last.
-                pages = pages[0:int(len(pages)/2)]
-                self._wrapper.ensure_click(pages[random.randrange(1, len(pages) - 2)])
-                self._navbar.update()
-            return
-        raise RuntimeError("No manga with enough chapters nor with link on mangafox")
+        if self._driver.current_url == 'https://fanfox.net':
+            print('Failed ? Still on homepage')
+            return False
+        print(self._driver.current_url)
+
+        if len(self._driver.current_url.split('/')) != 7:
+            print('Does not support URLS with volume part for now:'
+                  f' {len(self._driver.current_url.split("/"))} parts')
+            return False
+        self._navbar.update()
+        return self.has_prev_page() and self.has_next_page()
+
+    @retry(abort=True)
+    @check_predicate(RetriableError, "Could not load random comic")
+    def load_random(self):
+        self.load_candidate()
+
+        # Now, select a page which has both "next" and "prev" pages (ie:
+        # neither first nor last), but first we need to ensure the DOM has been
+        # properly updated, and that the required select is present (it's added
+        # dynamically)
+        pages = self._driver.find_elements(by=By.CSS_SELECTOR, value='div > div > span > a')
+
+        if len(pages) <= 2:
+            # This might mean that we're looking at one-page chapters for the
+            # manga. As the reader supports it, let's go with this.
+            self._navbar.update()
+        else:
+            # Only retain half the links (the navigation buttons are present twice
+            # in a page, on top of the scan and underneath it), and click on a
+            # page link which is neither the first nor the last.
+            pages = pages[0:int(len(pages)/2)]
+            self._wrapper.ensure_click(pages[random.randrange(1, len(pages) - 2)])
+            self._navbar.update()
 
     def has_prev_page(self):
         return self._navbar.has_prev_page()
@@ -1,5 +1,3 @@
-import random
-
 from selenium.common.exceptions import NoSuchElementException
 from selenium.webdriver.common.by import By
 from selenium.webdriver.common.action_chains import ActionChains
@@ -13,12 +11,6 @@ class MangaKakalotDriver(SupportBase):
     def __init__(self, *args, **kwargs):
         super(MangaKakalotDriver, self).__init__(*args, **kwargs)
 
-    def _get_mangas(self):
-        # First, go to the website
-        self.home()
-        # Retrieve the generated random link, which is generated after loading the page
-        return self._driver.find_elements(by=By.CLASS_NAME, value='itemupdate')
-
     def validate_popup(self):
         # Bypass a common popup acting as a layer on top of the page...
         try:
@@ -36,25 +28,22 @@ class MangaKakalotDriver(SupportBase):
         self._driver.get('https://mangakakalot.com/')
         self.validate_popup()
 
+    def list_candidates(self):
+        # First, go to the website
+        self.home()
+        # Retrieve the generated random link, which is generated after loading the page
+        chapters_lists = self._chapter_links('.itemupdate', 'li>span>a')
+
+        def testable(cs):
+            return len(cs) >= 3 and '.' not in cs[1].split('/')[-1]
+
+        return [chapters[1] for chapters in chapters_lists
+                if testable(chapters) and '://mangakakalot.com/' in chapters[1]]
+
     @retry(abort=True)
     @check_predicate(RetriableError, "Could not load random comic")
     def load_random(self):
-        chapters_lists = [manga.find_elements(by=By.CSS_SELECTOR, value='li>span>a')
-                          for manga in self._get_mangas()]
-
-        def testable(cs):
-            return len(cs) >= 3 and '.' not in cs[1].get_attribute('href').split('/')[-1]
-
-        candidates = [chapters[1].get_attribute('href')
-                      for chapters in chapters_lists if testable(chapters)]
-        while len(candidates) > 0:
-            candidate = candidates.pop(random.randrange(len(candidates)))
-            if '://mangakakalot.com/' not in candidate:
-                continue
-            self._driver.get(candidate)
-            return
-
-        raise RuntimeError("No manga with enough chapters nor with link on mangakakalot")
+        self.load_candidate()
 
     def has_prev_page(self):
         if self._driver.find_elements(by=By.CSS_SELECTOR, value='.btn-navigation-chap>.next'):
@@ -1,5 +1,3 @@
-import random
-
 from selenium.common.exceptions import NoSuchElementException, StaleElementReferenceException, WebDriverException
 from selenium.webdriver.common.by import By
 from selenium.webdriver.common.action_chains import ActionChains
@@ -13,39 +11,33 @@ class MangaNatoDriver(SupportBase):
     def __init__(self, *args, **kwargs):
         super(MangaNatoDriver, self).__init__(*args, **kwargs)
 
-    def _get_mangas(self):
-        # First, go to the website
-        self.home()
-        # Retrieve the generated random link, which is generated after loading the page
-        return self._driver.find_elements(by=By.CLASS_NAME, value='content-homepage-item')
-
     def home(self):
         """
             Loads the homepage of the reader
         """
         self._driver.get('https://manganato.com/')
 
-    @retry(abort=True)
-    @check_predicate(RetriableError, "Could not load random comic")
-    def load_random(self):
-        to_ignore = []
-
-        mangas = self._get_mangas()
-        while len(mangas) > 0:
-            manga = mangas.pop(random.randrange(len(mangas)))
-            chapters = manga.find_elements(by=By.CSS_SELECTOR, value='.item-chapter>a')
+    def list_candidates(self):
+        # First, go to the website
+        self.home()
+        candidates = []
+        # Retrieve the generated random link, which is generated after loading the page
+        for chapters in self._chapter_links('.content-homepage-item', '.item-chapter>a'):
             if len(chapters) < 3:
                 continue
-            href = chapters[1].get_attribute('href')
-            if (('://manganato.com/' not in href and '://readmanganato.com/' not in href) or href in to_ignore):
+            href = chapters[1]
+            if '://manganato.com/' not in href and '://readmanganato.com/' not in href:
                 continue
             url_parts = [p for p in href.split('/') if p]
             if len(url_parts[-1].split('-')[-1].split('.')) > 1:
                 continue
-            self._driver.get(href)
-            return
+            candidates.append(href)
+        return candidates
 
-        raise RuntimeError("No manga with enough chapters nor with link on manganelo")
+    @retry(abort=True)
+    @check_predicate(RetriableError, "Could not load random comic")
+    def load_random(self):
+        self.load_candidate()
 
     def has_prev_page(self):
         return bool(self._driver.find_elements(
@@ -0,0 +1,148 @@
+"""
+Event-driven waits: the awaited conditions are checked within the page, by a
+MutationObserver, so a wait returns as soon as the DOM changes instead of on
+the next poll of a WebDriverWait, and costs a single round trip.
+
+The conditions are declared with the functions below, on a target which is
+either a CSS selector (the condition then holds when any matching element
+satisfies it, or when none does if `expected` is False) or a WebElement.
+"""
+import time
+
+from selenium.common.exceptions import StaleElementReferenceException, TimeoutException
+
+
+# The longest a single script waits, which must stay below the script timeout
+# of the drivers (30s by default): longer waits are made of several scripts.
+MAX_SCRIPT_WAIT = 20
+WAIT_SCRIPT = """
+var conditions = arguments[0];
+var timeout = arguments[1];
+var done = arguments[arguments.length - 1];
+function displayed(elm) {
+    return window.getComputedStyle(elm).visibility !== 'hidden'
+        && elm.getClientRects().length > 0;
+}
+var predicates = {
+    present: function(c, elm) { return true; },
+    displayed: function(c, elm) { return displayed(elm); },
+    'class': function(c, elm) { return elm.classList.contains(c.name); },
+    text: function(c, elm) {
+        var text = (elm.innerText || elm.textContent || '').trim();
+        if (c.text === null) {
+            return text !== '';
+        }
+        return c.exact ? text === c.text : text.indexOf(c.text) !== -1;
+    },
+    css: function(c, elm) {
+        return window.getComputedStyle(elm).getPropertyValue(c.property) === c.value;
+    },
+};
+function holds(c) {
+    if (c.type === 'stale') {
+        return !document.documentElement.contains(c.element);
+    }
+    var elements = c.element ? [c.element] : document.querySelectorAll(c.selector);
+    var matches = Array.prototype.some.call(elements, function(elm) {
+        return predicates[c.type](c, elm);
+    });
+    return matches === c.expected;
+}
+function check() {
+    return conditions.every(holds);
+}
+if (check()) {
+    return done(true);
+}
+// Computed styles may also change without any mutation (stylesheets,
+// transitions), hence the in-page polling along with the observer.
+var observer = new MutationObserver(function() {
+    if (check()) {
+        finish(true);
+    }
+});
+var poll = setInterval(function() {
+    if (check()) {
+        finish(true);
+    }
+}, 100);
+var timer = setTimeout(function() { finish(check()); }, timeout);
+function finish(result) {
+    observer.disconnect();
+    clearInterval(poll);
+    clearTimeout(timer);
+    done(result);
+}
+observer.observe(document.documentElement, {
+    subtree: true, childList: true, attributes: true, characterData: true,
+});
+"""
+
+
+def _condition(type, target, expected=True, **params):
+    condition = {'type': type, 'expected': expected}
+    if isinstance(target, str):
+        condition['selector'] = target
+    else:
+        condition['element'] = target
+    condition.update(params)
+    return condition
+
+
+def present(target, expected=True):
+    return _condition('present', target, expected)
+
+
+def displayed(target, expected=True):
+    return _condition('displayed', target, expected)
+
+
+def has_class(target, name, expected=True):
+    return _condition('class', target, expected, name=name)
+
+
+def has_text(target, text=None, exact=False, expected=True):
+    """
+        The text of the target contains `text` (or equals it if `exact`), or
+        is not empty when `text` is None.
+    """
+    return _condition('text', target, expected, text=text, exact=exact)
+
+
+def css(target, property, value, expected=True):
+    """
+        The computed value of the CSS `property` of the target is `value`.
+    """
+    return _condition('css', target, expected, property=property, value=value)
+
+
+def stale(element):
+    """
+        The element was removed from the document.
+    """
+    return {'type': 'stale', 'element': element}
+
+
+def wait_until(driver, conditions, timeout=10):
+    """
+        Waits until all the conditions hold in the current frame of the
+        driver, and raises a TimeoutException (as WebDriverWait does) if they
+        still do not after `timeout` seconds.
+    """
+    if isinstance(conditions, dict):
+        conditions = [conditions]
+    deadline = time.monotonic() + timeout
+    while True:
+        remaining = deadline - time.monotonic()
+        wait_ms = int(max(0, min(remaining, MAX_SCRIPT_WAIT)) * 1000)
+        try:
+            if driver.execute_async_script(WAIT_SCRIPT, conditions, wait_ms):
+                return
+        except StaleElementReferenceException:
+            # A removed element cannot even be given to the script
+            if any(c['type'] == 'stale' for c in conditions):
+                return
+            raise
+        if time.monotonic() >= deadline:
+            raise TimeoutException('Conditions not met after {}s: {}'.format(
+                timeout, [{k: v for k, v in c.items() if k != 'element'} for c in conditions]))
@@ -0,0 +1,8 @@
+import os
+import sys
+
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# The tools import each other as top-level modules, as when they are run as
+# scripts
+sys.path.insert(0, os.path.join(REPO_DIR, 'tools'))
@@ -0,0 +1,88 @@
+import json
+import os
+
+import pytest
+
+from bundler import BASE64, build_bundles, bundle, encode_vlq
+
+from .conftest import REPO_DIR
+
+
+def decode_vlq(encoded):
+    """
+    Returns the numbers encoded as base64 VLQs in `encoded`.
+    """
+    values = []
+    value = shift = 0
+    for char in encoded:
+        digit = BASE64.index(char)
+        value += (digit & 0x1f) << shift
+        shift += 5
+        if not digit & 0x20:
+            values.append(-(value >> 1) if value & 1 else value >> 1)
+            value = shift = 0
+    return values
+
+
+@pytest.mark.parametrize('value, encoded', [
+    (0, 'A'),
+    (1, 'C'),
+    (-1, 'D'),
+    (15, 'e'),
+    (16, 'gB'),
+    (-16, 'hB'),
+    (123, '2H'),
+    (1000, 'w+B'),
+])
+def test_encode_vlq(value, encoded):
+    assert encode_vlq(value) == encoded
+    assert decode_vlq(encoded) == [value]
+
+
+def test_bundle():
+    sources = {'a.js': 'var a;\nvar b;\n', 'engine/c.js': 'var c;'}
+    content, source_map = bundle('bundles/reader.js', ['a.js', 'engine/c.js'],
+                                 sources.__getitem__)
+    assert content == 'var a;\nvar b;\nvar c;\n//# sourceMappingURL=reader.js.map\n'
+    source_map = json.loads(source_map)
+    assert source_map == {
+        'version': 3,
+        'file': 'reader.js',
+        'sources': ['../a.js', '../engine/c.js'],
+        'names': [],
+        'mappings': 'AAAA;AACA;ACDA',
+    }
+
+
+def test_bundle_mappings():
+    sources = {
+        'a.js': 'var a;\n\nvar b;\n',
+        'b.js': '',
+        'c.js': '// c\nvar c;\nvar d;\nvar e;',
+    }
+    scripts = ['a.js', 'b.js', 'c.js']
+    content, source_map = bundle('bundles/reader.js', scripts, sources.__getitem__)
+    lines = content.splitlines()
+    # Every line of the bundle (but the source map comment) maps to the line
+    # of the script it comes from, the fields being relative to the previous
+    # segment
+    segments = json.loads(source_map)['mappings'].split(';')
+    assert len(segments) == len(lines) - 1
+    source = line = 0
+    for bundle_line, segment in zip(lines, segments):
+        column, source_delta, line_delta, source_column = decode_vlq(segment)
+        assert (column, source_column) == (0, 0)
+        source += source_delta
+        line += line_delta
+        assert sources[scripts[source]].split('\n')[line] == bundle_line
+
+
+def test_build_bundles():
+    browsers_dir = os.path.join(REPO_DIR, 'browsers')
+    files = build_bundles(lambda script: '// {}\n'.format(script), browsers_dir)
+    assert sorted(files) == sorted(
+        name for reader in ['manganato', 'mangafox', 'mangakakalot', 'isekaiscan']
+        for name in ['bundles/{}.js'.format(reader), 'bundles/{}.js.map'.format(reader)])
+    assert '// support/mangafox.js\n// entrypoint.js\n' in files['bundles/mangafox.js']
+    source_map = json.loads(files['bundles/mangafox.js.map'])
+    assert source_map['sources'][-2:] == ['../support/mangafox.js', '../entrypoint.js']
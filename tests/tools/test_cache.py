@@ -0,0 +1,100 @@
+import json
+import os
+
+from cache import CACHE_VERSION, ScanCache
+from engine import Rule, scan_files
+
+
+class CountingRule(Rule):
+    """
+    Finds the length of the files, counting the files it scans.
+    """
+    name = 'length'
+
+    def __init__(self):
+        self.scanned = []
+
+    def scan(self, source):
+        self.scanned.append(os.path.basename(source.path))
+        return len(source.content)
+
+
+def scan(rule, paths, cache):
+    return [check.findings for check in scan_files([rule], paths, cache)]
+
+
+def test_cache_invalidation(tmp_path):
+    paths = [str(tmp_path / 'a.js'), str(tmp_path / 'b.js')]
+    for path in paths:
+        with open(path, 'w') as f:
+            f.write('var a;\n')
+    cache_path = str(tmp_path / 'cache.json')
+    rule = CountingRule()
+    cache = ScanCache(cache_path).load()
+    assert scan(rule, paths, cache) == [{'length': 7}, {'length': 7}]
+    cache.save()
+    assert rule.scanned == ['a.js', 'b.js']
+
+    # Unchanged files are not even read
+    cache = ScanCache(cache_path).load()
+    assert scan(rule, paths, cache) == [{'length': 7}, {'length': 7}]
+    assert rule.scanned == ['a.js', 'b.js']
+
+    # A changed file is scanned again
+    with open(paths[1], 'w') as f:
+        f.write('var b = 1;\n')
+    assert scan(rule, paths, cache) == [{'length': 7}, {'length': 11}]
+    assert rule.scanned == ['a.js', 'b.js', 'b.js']
+
+    # And its new findings are cached
+    cache.save()
+    cache = ScanCache(cache_path).load()
+    assert scan(rule, paths, cache) == [{'length': 7}, {'length': 11}]
+    assert rule.scanned == ['a.js', 'b.js', 'b.js']
+
+
+def test_cache_touched_file(tmp_path):
+    path = str(tmp_path / 'a.js')
+    with open(path, 'w') as f:
+        f.write('var a;\n')
+    rule = CountingRule()
+    cache = ScanCache(str(tmp_path / 'cache.json'))
+    scan(rule, [path], cache)
+    # Only the mtime changes: the file is read, but its content hash matches
+    os.utime(path, ns=(0, 0))
+    assert scan(rule, [path], cache) == [{'length': 7}]
+    assert rule.scanned == ['a.js']
+    assert cache.lookup_unchanged(path, ['length']) == {'length': 7}
+
+
+def test_cache_version(tmp_path):
+    path = str(tmp_path / 'a.js')
+    with open(path, 'w') as f:
+        f.write('var a;\n')
+    cache_path = str(tmp_path / 'cache.json')
+    cache = ScanCache(cache_path)
+    scan(CountingRule(), [path], cache)
+    cache.save()
+    with open(cache_path, 'r') as f:
+        data = json.load(f)
+    data['version'] = CACHE_VERSION - 1
+    with open(cache_path, 'w') as f:
+        json.dump(data, f)
+    rule = CountingRule()
+    scan(rule, [path], ScanCache(cache_path).load())
+    assert rule.scanned == ['a.js']
+
+
+def test_cache_removed_file(tmp_path):
+    path = str(tmp_path / 'a.js')
+    with open(path, 'w') as f:
+        f.write('var a;\n')
+    cache_path = str(tmp_path / 'cache.json')
+    cache = ScanCache(cache_path)
+    scan(CountingRule(), [path], cache)
+    cache.save()
+    os.remove(path)
+    cache = ScanCache(cache_path).load()
+    cache.save()
+    with open(cache_path, 'r') as f:
+        assert json.load(f)['files'] == {}
@@ -0,0 +1,81 @@
+from engine import Rule, run_rules, scan_files
+
+
+class LinesRule(Rule):
+    """
+    Finds the lines containing `TODO`, and reports them as errors.
+    """
+    name = 'todo lines'
+
+    def __init__(self):
+        self.started = 0
+        self.finished = 0
+
+    def start(self, errors):
+        self.started += 1
+
+    def accepts(self, path):
+        return not path.endswith('.min.js')
+
+    def scan(self, source):
+        return [index + 1 for index, line in enumerate(source.lines) if 'TODO' in line]
+
+    def collect(self, path, findings, errors):
+        errors.extend('[{}:{}]: TODO left'.format(path, line) for line in findings)
+
+    def finish(self, errors):
+        self.finished += 1
+
+
+def write_files(directory, files):
+    paths = []
+    for name, content in files:
+        path = directory / name
+        path.write_text(content)
+        paths.append(str(path))
+    return paths
+
+
+FILES = [
+    ('a.js', 'var a = 1;\n// TODO: b\n'),
+    ('b.min.js', '// TODO\n'),
+    ('c.js', 'var c;\n'),
+    ('d.js', '// TODO\n// TODO\n'),
+]
+
+
+def test_scan_files(tmp_path):
+    paths = write_files(tmp_path, FILES)
+    checks = list(scan_files([LinesRule()], paths))
+    assert [(check.path, check.findings) for check in checks] == [
+        (paths[0], {'todo lines': [2]}),
+        (paths[2], {'todo lines': []}),
+        (paths[3], {'todo lines': [1, 2]}),
+    ]
+
+
+def test_scan_files_jobs(tmp_path):
+    # Enough files for several batches, which must come back in order
+    paths = write_files(tmp_path, [('{}-{}'.format(i, name), content)
+                                   for i in range(20) for name, content in FILES])
+    expected = [(check.path, check.findings) for check in scan_files([LinesRule()], paths)]
+    assert [(check.path, check.findings)
+            for check in scan_files([LinesRule()], paths, jobs=2)] == expected
+
+
+def test_scan_files_unreadable(tmp_path):
+    paths = write_files(tmp_path, FILES[:1]) + [str(tmp_path / 'missing.js')]
+    assert [check.findings for check in scan_files([LinesRule()], paths)] == [
+        {'todo lines': [2]}, None]
+
+
+def test_run_rules(tmp_path):
+    write_files(tmp_path, FILES)
+    rule = LinesRule()
+    errors = run_rules([rule], str(tmp_path))
+    assert sorted(errors) == sorted([
+        '[{}:2]: TODO left'.format(tmp_path / 'a.js'),
+        '[{}:1]: TODO left'.format(tmp_path / 'd.js'),
+        '[{}:2]: TODO left'.format(tmp_path / 'd.js'),
+    ])
+    assert (rule.started, rule.finished) == (1, 1)
@@ -0,0 +1,62 @@
+import pytest
+
+from js_tokens import TokenizeError, find_sequence, parse_literal, tokenize, unquote
+
+
+def kinds_values(content):
+    return [(token.kind, token.value) for token in tokenize(content)]
+
+
+def test_comments():
+    assert kinds_values('a // b\n/* c\n d */ e') == [('name', 'a'), ('name', 'e')]
+    # Lines are still counted within the comments
+    assert [token.line for token in tokenize('a /* b\n\n */ c // d\ne')] == [1, 3, 4]
+
+
+def test_strings():
+    assert kinds_values('''f('a // b', "c /* d */", 'e\\'f', `g ${h}`)''') == [
+        ('name', 'f'), ('punct', '('), ('string', "'a // b'"), ('punct', ','),
+        ('string', '"c /* d */"'), ('punct', ','), ('string', "'e\\'f'"), ('punct', ','),
+        ('template', '`g ${h}`'), ('punct', ')')]
+
+
+@pytest.mark.parametrize('literal, value', [
+    ("'a\\'b'", "a'b"),
+    ('"a\\nb"', 'a\nb'),
+    ("'\\x41\\u0042\\u{43}'", 'ABC'),
+    ("'a\\\nb'", 'ab'),
+    ("'\\d'", 'd'),
+])
+def test_unquote(literal, value):
+    assert unquote(literal) == value
+
+
+def test_regex_literals():
+    assert kinds_values("x = /a\\/b[/]c/gi.test(y);") == [
+        ('name', 'x'), ('punct', '='), ('regex', '/a\\/b[/]c/gi'), ('punct', '.'),
+        ('name', 'test'), ('punct', '('), ('name', 'y'), ('punct', ')'), ('punct', ';')]
+    assert kinds_values("return /'/;") == [
+        ('name', 'return'), ('regex', "/'/"), ('punct', ';')]
+
+
+def test_divisions():
+    assert kinds_values("a = b / c / d; e = (f) / 2;") == [
+        ('name', 'a'), ('punct', '='), ('name', 'b'), ('punct', '/'), ('name', 'c'),
+        ('punct', '/'), ('name', 'd'), ('punct', ';'), ('name', 'e'), ('punct', '='),
+        ('punct', '('), ('name', 'f'), ('punct', ')'), ('punct', '/'), ('number', '2'),
+        ('punct', ';')]
+
+
+def test_parse_literal():
+    tokens = tokenize("var t = {\n  'a': 'b' + \"c\",\n  d: { e: 1 },\n};")
+    index = find_sequence(tokens, ['t', '=', '{'])
+    value, end = parse_literal(tokens, index - 1)
+    assert value == [('a', 2, 'bc'), ('d', 3, [('e', 3, '1')])]
+    assert tokens[end].value == ';'
+
+
+def test_parse_literal_errors():
+    with pytest.raises(TokenizeError, match='Unexpected object key'):
+        parse_literal(tokenize("{ a b }"), 0)
+    with pytest.raises(TokenizeError, match='Unexpected token'):
+        parse_literal(tokenize("{ a: ( }"), 0)
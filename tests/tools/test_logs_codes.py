@@ -0,0 +1,45 @@
+import os
+
+import pytest
+
+from js_tokens import TokenizeError, parse_literal, tokenize
+from logs_codes import STRINGS_PATH, get_all_defined_strings_and_error_codes
+
+from .conftest import REPO_DIR
+
+
+def read_strings():
+    with open(os.path.join(REPO_DIR, STRINGS_PATH), 'r') as f:
+        return f.read()
+
+
+def test_parse_definitions():
+    errors = []
+    error_codes, string_codes = get_all_defined_strings_and_error_codes(
+        errors, os.path.join(REPO_DIR, STRINGS_PATH))
+    assert errors == []
+    assert string_codes['S1']['texts'] == {'en': 'Failed to get Comic data from storage'}
+    assert error_codes['E0007']['string'] == 'S8'
+
+
+@pytest.mark.parametrize('end', [
+    "",
+    "'E0007'",
+    "'E0007': ",
+    "'E0007': 'S8',",
+    "'E0007': 'S8",
+])
+def test_truncated_strings(tmp_path, end):
+    # Truncated within the ERRORS table, which follows the STRINGS one
+    content = read_strings()
+    path = tmp_path / 'strings.js'
+    path.write_text(content[:content.index("'E0007': 'S8'")] + end)
+    errors = []
+    assert get_all_defined_strings_and_error_codes(errors, str(path)) == ({}, {})
+    assert len(errors) == 1
+    assert errors[0].startswith('[{}]: '.format(path))
+
+
+def test_parse_literal_end_of_input():
+    with pytest.raises(TokenizeError, match='end of input'):
+        parse_literal(tokenize("{ a: 'b', c: "), 0)
@@ -0,0 +1,76 @@
+import json
+import os
+
+import pytest
+
+from manifest import ManifestError, merge, render, render_data, write_manifest
+
+from .conftest import REPO_DIR
+
+
+BROWSERS_DIR = os.path.join(REPO_DIR, 'browsers')
+READERS = ['manganato', 'mangafox', 'mangakakalot', 'isekaiscan']
+
+
+def test_merge():
+    base = {'name': 'a', 'background': {'scripts': ['a.js'], 'persistent': False}}
+    overlay = {'name': 'b', 'background': {'scripts': ['b.js']}, 'extra': {'c': 1}}
+    assert merge(base, overlay) == {
+        'name': 'b',
+        'background': {'scripts': ['b.js'], 'persistent': False},
+        'extra': {'c': 1},
+    }
+    # The base is left untouched
+    assert base == {'name': 'a', 'background': {'scripts': ['a.js'], 'persistent': False}}
+    # A non-object value replaces an object, and the other way around
+    assert merge({'a': {'b': 1}}, {'a': 2}) == {'a': 2}
+    assert merge({'a': 2}, {'a': {'b': 1}}) == {'a': {'b': 1}}
+
+
+@pytest.mark.parametrize('browser', ['firefox', 'chrome'])
+def test_render_data(browser):
+    with open(os.path.join(BROWSERS_DIR, 'base.json'), 'r') as f:
+        base = json.load(f)
+    data = render_data(browser, BROWSERS_DIR)
+    for key, value in base.items():
+        assert data[key] == value
+    assert [entry['js'] for entry in data['content_scripts']] == [
+        ['bundles/{}.js'.format(reader)] for reader in READERS]
+    assert all(entry['all_frames'] for entry in data['content_scripts'])
+    assert data['content_scripts'][0]['matches'] == ['*://manganato.com/*',
+                                                     '*://readmanganato.com/*']
+
+
+def test_render_data_overlay():
+    assert render_data('firefox', BROWSERS_DIR)['applications'] == {
+        'gecko': {'id': 'support@bookmycomics.org'}}
+    assert 'applications' not in render_data('chrome', BROWSERS_DIR)
+
+
+def test_render_data_not_bundled():
+    data = render_data('chrome', BROWSERS_DIR, bundled=False)
+    scripts = data['content_scripts'][1]['js']
+    assert scripts[0] == 'strings.compiled.js'
+    assert scripts[-2:] == ['support/mangafox.js', 'entrypoint.js']
+    assert not any('{reader}' in script for script in scripts)
+
+
+def test_render():
+    content = render('firefox', BROWSERS_DIR)
+    assert content.endswith('}\n')
+    assert json.loads(content) == render_data('firefox', BROWSERS_DIR)
+
+
+def test_render_unknown_browser():
+    with pytest.raises(ManifestError):
+        render_data('opera', BROWSERS_DIR)
+
+
+def test_write_manifest(tmp_path, capsys):
+    path = str(tmp_path / 'manifest.json')
+    assert write_manifest('chrome', path, BROWSERS_DIR) == 0
+    with open(path, 'r') as f:
+        assert f.read() == render('chrome', BROWSERS_DIR)
+    assert 'written into' in capsys.readouterr().out
+    assert write_manifest('chrome', path, BROWSERS_DIR) == 0
+    assert 'already up-to-date' in capsys.readouterr().out
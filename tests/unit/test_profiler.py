@@ -0,0 +1,38 @@
+from ..func.utils import RetriableError, check_predicate, retry, retry_on_ex
+from ..func.utils.profiler import CommandProfiler
+
+
+class FakeDriver:
+    def execute(self, command, params=None):
+        return {'value': None}
+
+
+class FakeReaderDriver:
+    def __init__(self, driver):
+        self._driver = driver
+
+    def load_candidate(self):
+        self._driver.execute('get', {'url': 'https://example.com/'})
+
+    @retry(abort=True)
+    @check_predicate(RetriableError, "Could not load random comic")
+    def load_random(self):
+        self.load_candidate()
+
+    @retry_on_ex([RetriableError])
+    def next_page(self):
+        self._driver.execute('clickElement')
+
+
+def test_profiler_charges_decorated_helpers():
+    command_profiler = CommandProfiler()
+    reader = FakeReaderDriver(command_profiler.wrap(FakeDriver()))
+    reader.load_random()
+    reader.next_page()
+    assert [(record.command, record.helper) for record in command_profiler.records] == [
+        ('get', 'FakeReaderDriver.load_random'),
+        ('clickElement', 'FakeReaderDriver.next_page'),
+    ]
+    assert command_profiler.records[0].stack == [
+        'test_profiler_charges_decorated_helpers', 'FakeReaderDriver.load_random',
+        'FakeReaderDriver.load_candidate']
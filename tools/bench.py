@@ -0,0 +1,236 @@
+"""
+Benchmarks the JS code checkers on synthetic web-extension trees.
+
+The `main_func` of logs_codes.py and functions_replacement.py are timed end to
+end (without and with their cache), and the time spent in each phase of a run
+(start, discovery, read, parse, check) is measured as well. The results are
+written as JSON, so that they can be compared between commits:
+
+> python tools/bench.py --files 10000 --output build/bench-before.json
+> python tools/bench.py --files 10000 --compare build/bench-before.json
+"""
+import argparse
+import contextlib
+import datetime
+import json
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+from engine import Timings, run_rules
+from functions_replacement import FUNCTIONS_TO_NOT_CALL, FunctionsReplacementRule
+import functions_replacement
+from logs_codes import CodesRule
+import logs_codes
+
+
+TOOLS = {
+    'logs_codes': (logs_codes.main_func, lambda strings_path: [CodesRule(strings_path)]),
+    'functions_replacement': (functions_replacement.main_func,
+                              lambda strings_path: [FunctionsReplacementRule()]),
+}
+
+
+def generate_tree(root, nb_files, nb_lines, nb_codes, forbidden_density=0.0, seed=0):
+    """
+    Generates a synthetic web-extension tree into `root`: a `strings.js` file
+    defining `nb_codes` string codes (and as many error codes), and `nb_files`
+    JS files of `nb_lines` lines using them. `forbidden_density` is the ratio
+    of lines calling one of the FUNCTIONS_TO_NOT_CALL.
+
+    Returns the path of the generated `strings.js`.
+    """
+    rand = random.Random(seed)
+    forbidden = list(FUNCTIONS_TO_NOT_CALL)
+    os.makedirs(root, exist_ok=True)
+    strings_path = os.path.join(root, 'strings.js')
+    with open(strings_path, 'w') as f:
+        f.write("function Localization(lang = DEFAULT_LANG) {\n")
+        f.write("    this.STRINGS = {\n")
+        for i in range(nb_codes):
+            f.write("        'S{}': {{\n            'en': 'String {}',\n        }},\n"
+                    .format(i, i))
+        f.write("    };\n}\n\n")
+        f.write("function Logs(level = INFO) {\n")
+        f.write("    this.ERRORS = {\n")
+        for i in range(nb_codes):
+            f.write("        'E{:04}': 'S{}',\n".format(i, i))
+        f.write("    };\n}\n")
+
+    for i in range(nb_files):
+        directory = os.path.join(root, 'dir{}'.format(i // 100))
+        os.makedirs(directory, exist_ok=True)
+        lines = []
+        for j in range(nb_lines):
+            if rand.random() < forbidden_density:
+                lines.append("    const args{} = {}(arguments);".format(j, rand.choice(forbidden)))
+                continue
+            kind = rand.randrange(10)
+            if kind == 0:
+                lines.append("    LOGS.log('S{}');".format(rand.randrange(nb_codes)))
+            elif kind == 1:
+                lines.append("    LOGS.error('E{:04}', {{'err': err}});"
+                             .format(rand.randrange(nb_codes)))
+            elif kind == 2:
+                lines.append("    // LOGS.log('S{}');".format(rand.randrange(nb_codes)))
+            else:
+                lines.append("    const value{} = compute(value{} + {});".format(j, j - 1, j))
+        with open(os.path.join(directory, 'file{}.js'.format(i)), 'w') as f:
+            f.write('function f{}() {{\n{}\n}}\n'.format(i, '\n'.join(lines)))
+    return strings_path
+
+
+@contextlib.contextmanager
+def quiet():
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        yield
+
+
+def time_main(main_func, argv, repeat):
+    """
+    Returns the best time of `repeat` runs of a tool's `main_func`, along with
+    its number of errors.
+    """
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        with quiet():
+            nb_errors = main_func(argv)
+        duration = time.perf_counter() - start
+        best = duration if best is None else min(best, duration)
+    return best, nb_errors
+
+
+def time_phases(make_rules, strings_path, root, repeat):
+    """
+    Returns the time spent in each phase of the best of `repeat` serial runs
+    without cache.
+    """
+    best = None
+    for _ in range(repeat):
+        timings = Timings()
+        with quiet():
+            run_rules(make_rules(strings_path), root, None, 1, timings)
+        if best is None or sum(timings.phases.values()) < sum(best.values()):
+            best = timings.phases
+    return best
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', 'HEAD'], stderr=subprocess.DEVNULL,
+                                       universal_newlines=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmarks(args):
+    results = []
+    workdir = tempfile.mkdtemp(prefix='bmc-bench-')
+    cwd = os.getcwd()
+    try:
+        # The tools work on the `web-extension` directory of the current
+        # directory.
+        root = 'web-extension'
+        os.chdir(workdir)
+        print("=> Generating {} files of {} lines...".format(args.files, args.lines))
+        strings_path = generate_tree(root, args.files, args.lines, args.codes,
+                                     args.forbidden_density)
+        print("<= Done")
+        for name, (main_func, make_rules) in TOOLS.items():
+            for jobs in args.jobs:
+                cold, nb_errors = time_main(main_func, ['--no-cache', '-j', str(jobs)],
+                                            args.repeat)
+                # First run to fill the cache, then time the runs using it
+                with quiet():
+                    main_func(['-j', str(jobs)])
+                warm, _ = time_main(main_func, ['-j', str(jobs)], args.repeat)
+                results.append({'tool': name, 'jobs': jobs, 'cold': cold, 'warm': warm,
+                                'errors': nb_errors})
+                print("{:<22} jobs={:<3} cold={:.3f}s warm={:.3f}s errors={}"
+                      .format(name, jobs, cold, warm, nb_errors))
+            phases = time_phases(make_rules, strings_path, root, args.repeat)
+            results.append({'tool': name, 'jobs': 1, 'phases': phases})
+            print("{:<22} phases: {}".format(name, ', '.join(
+                '{}={:.3f}s'.format(phase, duration) for phase, duration in phases.items())))
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(workdir)
+    return results
+
+
+def compare(results, reference):
+    """
+    Prints the relative change of every timing compared to a previous run.
+    """
+    def key(result):
+        return result['tool'], result['jobs'], 'phases' in result
+
+    previous = {key(result): result for result in reference['results']}
+    print("=== Compared to {} ===".format(reference.get('commit') or 'reference'))
+    for result in results:
+        old = previous.get(key(result))
+        if old is None:
+            continue
+        timings = result.get('phases', result)
+        old_timings = old.get('phases', old)
+        for name in sorted(timings):
+            if name in ('tool', 'jobs', 'errors') or not old_timings.get(name):
+                continue
+            print("{:<22} jobs={:<3} {:<10} {:.3f}s -> {:.3f}s ({:+.1f}%)".format(
+                result['tool'], result['jobs'], name, old_timings[name], timings[name],
+                (timings[name] / old_timings[name] - 1) * 100))
+
+
+def main_func(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--files', type=int, default=2000, help='Number of JS files')
+    parser.add_argument('--lines', type=int, default=50, help='Number of lines per file')
+    parser.add_argument('--codes', type=int, default=100,
+                        help='Number of string codes (and of error codes)')
+    parser.add_argument('--forbidden-density', type=float, default=0.001,
+                        help='Ratio of lines calling a forbidden function')
+    parser.add_argument('--jobs', default='1',
+                        type=lambda value: [int(j) for j in value.split(',')],
+                        help='Comma-separated list of the numbers of jobs to time')
+    parser.add_argument('--repeat', type=int, default=3,
+                        help='Number of runs of each measure (the best one is kept)')
+    parser.add_argument('--output', default='build/bench-results.json',
+                        help='Path of the JSON results')
+    parser.add_argument('--compare', metavar='PATH',
+                        help='JSON results of a previous run to compare with')
+    args = parser.parse_args(argv)
+
+    reference = None
+    if args.compare:
+        with open(args.compare, 'r') as f:
+            reference = json.load(f)
+    output = os.path.abspath(args.output)
+
+    results = run_benchmarks(args)
+    data = {
+        'commit': git_commit(),
+        'date': datetime.datetime.now().isoformat(),
+        'python': platform.python_version(),
+        'cpus': os.cpu_count(),
+        'params': {'files': args.files, 'lines': args.lines, 'codes': args.codes,
+                   'forbidden_density': args.forbidden_density, 'repeat': args.repeat},
+        'results': results,
+    }
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(data, f, indent=2)
+    print("Results written into '{}'".format(args.output))
+    if reference is not None:
+        compare(results, reference)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main_func())
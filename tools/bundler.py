@@ -0,0 +1,128 @@
+"""
+Concatenates the scripts injected in the pages of every reader into a single
+bundle, so that the browser injects one file per frame instead of a dozen.
+
+A source map (version 3) is written along with each bundle, so that the
+developer tools keep showing the original files and lines.
+"""
+import argparse
+import json
+import os
+import sys
+
+from manifest import BROWSERS_DIR, ManifestError, load_json, reader_scripts
+from utils import write_if_changed
+
+
+SOURCE_DIR = 'web-extension'
+# Relative to SOURCE_DIR
+BUNDLES_DIR = 'bundles'
+BASE64 = 'ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789+/'
+
+
+def bundle_path(reader):
+    return '{}/{}.js'.format(BUNDLES_DIR, reader)
+
+
+def encode_vlq(value):
+    """
+    Encodes a number as a base64 VLQ, as used by the source maps.
+    """
+    value = (-value << 1) | 1 if value < 0 else value << 1
+    encoded = ''
+    while True:
+        digit = value & 0x1f
+        value >>= 5
+        if value > 0:
+            digit |= 0x20
+        encoded += BASE64[digit]
+        if value == 0:
+            return encoded
+
+
+def bundle(name, scripts, read):
+    """
+    Returns the content of the bundle `name` made of the scripts, and of its
+    source map. `read` returns the content of a script from its path.
+    """
+    parts = []
+    mappings = []
+    previous_source = 0
+    previous_line = 0
+    for index, script in enumerate(scripts):
+        content = read(script)
+        if not content.endswith('\n'):
+            content += '\n'
+        parts.append(content)
+        # Every line of the bundle maps to the start of the same line in its
+        # script; the fields of a segment are relative to the previous one.
+        for line in range(content.count('\n')):
+            mappings.append('A' + encode_vlq(index - previous_source)
+                            + encode_vlq(line - previous_line) + 'A')
+            previous_source = index
+            previous_line = line
+    map_name = '{}.map'.format(os.path.basename(name))
+    parts.append('//# sourceMappingURL={}\n'.format(map_name))
+    source_map = {
+        'version': 3,
+        'file': os.path.basename(name),
+        'sources': [os.path.relpath(script, os.path.dirname(name)).replace(os.sep, '/')
+                    for script in scripts],
+        'names': [],
+        'mappings': ';'.join(mappings),
+    }
+    return ''.join(parts), json.dumps(source_map, separators=(',', ':')) + '\n'
+
+
+def build_bundles(read, browsers_dir=BROWSERS_DIR):
+    """
+    Returns the content of the bundle of every reader and of their source
+    maps, keyed by their path relative to SOURCE_DIR.
+    """
+    files = {}
+    for reader, scripts in reader_scripts(load_json('{}/content_scripts.json'
+                                                    .format(browsers_dir))).items():
+        name = bundle_path(reader)
+        files[name], files['{}.map'.format(name)] = bundle(name, scripts, read)
+    return files
+
+
+def read_source(script, source_dir=SOURCE_DIR):
+    with open(os.path.join(source_dir, script), 'r') as f:
+        return f.read()
+
+
+def write_bundles(source_dir=SOURCE_DIR, browsers_dir=BROWSERS_DIR):
+    """
+    Writes the bundles into the source directory (only the ones which
+    changed), and removes the outdated ones.
+    """
+    try:
+        files = build_bundles(lambda script: read_source(script, source_dir), browsers_dir)
+    except (OSError, ManifestError) as e:
+        print('Failed to bundle the content scripts: {}'.format(e))
+        return 3
+    directory = os.path.join(source_dir, BUNDLES_DIR)
+    try:
+        os.makedirs(directory, exist_ok=True)
+        nb_written = sum(write_if_changed(content, os.path.join(source_dir, name))
+                         for name, content in files.items())
+        for entry in os.listdir(directory):
+            if '{}/{}'.format(BUNDLES_DIR, entry) not in files:
+                os.remove(os.path.join(directory, entry))
+    except OSError as e:
+        print('Failed to write the bundles into "{}": {}'.format(directory, e))
+        return 4
+    print("Bundled the content scripts of {} readers into '{}' ({} files updated)"
+          .format(len(files) // 2, directory, nb_written))
+    return 0
+
+
+def main_func(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.parse_args(argv)
+    return write_bundles()
+
+
+if __name__ == "__main__":
+    sys.exit(main_func())
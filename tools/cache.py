@@ -0,0 +1,124 @@
+import hashlib
+import json
+import os
+
+
+CACHE_PATH = 'build/lint-cache.json'
+# To be bumped whenever the format of the cache (or of the findings stored in
+# it) changes, so that outdated caches are simply dropped.
+CACHE_VERSION = 2
+
+
+def content_hash(content):
+    return hashlib.sha1(content.encode('utf-8')).hexdigest()
+
+
+class ScanCache:
+    """
+    On-disk cache of the per-file findings of the rules, keyed by the file's
+    path and content hash.
+
+    The stat information (mtime and size) of a file is stored alongside its
+    hash, which allows skipping even the read of the files left untouched
+    since the previous run.
+    """
+
+    def __init__(self, path=CACHE_PATH):
+        self._path = path
+        self._files = {}
+        self._seen = set()
+        self._dirty = False
+
+    def load(self):
+        try:
+            with open(self._path, 'r') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return self
+        if data.get('version') == CACHE_VERSION:
+            self._files = data.get('files', {})
+        return self
+
+    def save(self):
+        # Forget about the files which were removed or renamed
+        for path in list(self._files):
+            if path not in self._seen and not os.path.isfile(path):
+                del self._files[path]
+                self._dirty = True
+        if not self._dirty:
+            return
+        try:
+            directory = os.path.dirname(self._path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(self._path, 'w') as f:
+                json.dump({'version': CACHE_VERSION, 'files': self._files}, f)
+            self._dirty = False
+        except OSError as e:
+            print('Failed to write cache into "{}": {}'.format(self._path, e))
+
+    @staticmethod
+    def _stat(path):
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        return [st.st_mtime_ns, st.st_size]
+
+    def lookup_unchanged(self, path, rule_keys):
+        """
+        Returns the cached findings of a file if its stat information did not
+        change since they were stored, without reading it. Returns None
+        otherwise.
+
+        The returned dict only holds the rules which have findings stored.
+        """
+        self._seen.add(path)
+        entry = self._files.get(path)
+        if entry is None or entry['stat'] != self._stat(path):
+            return None
+        return self._findings(entry, rule_keys)
+
+    def cached_state(self, path):
+        """
+        Returns the content hash of a file along with the keys of the rules
+        having findings cached for it, or None if the file is not cached.
+        """
+        entry = self._files.get(path)
+        if entry is None:
+            return None
+        return entry['hash'], list(entry['rules'])
+
+    def lookup(self, path, digest, rule_keys):
+        """
+        Returns the cached findings of a file matching its current content hash,
+        or None if the file changed since they were stored.
+        """
+        self._seen.add(path)
+        entry = self._files.get(path)
+        if entry is None or entry['hash'] != digest:
+            return None
+        # Only the stat changed (touched file): refresh it to avoid reading the
+        # file again next time.
+        entry['stat'] = self._stat(path)
+        self._dirty = True
+        return self._findings(entry, rule_keys)
+
+    def store(self, path, digest, findings):
+        """
+        Stores the findings of the rules for the given content hash of a file.
+        The findings of the other rules are kept if the content did not change.
+        """
+        self._seen.add(path)
+        entry = self._files.get(path)
+        if entry is None or entry['hash'] != digest:
+            entry = {'hash': digest, 'rules': {}}
+            self._files[path] = entry
+        entry['stat'] = self._stat(path)
+        entry['rules'].update(findings)
+        self._dirty = True
+
+    @staticmethod
+    def _findings(entry, rule_keys):
+        rules = entry['rules']
+        return {key: rules[key] for key in rule_keys if key in rules}
@@ -0,0 +1,350 @@
+import argparse
+from collections import deque
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from cache import CACHE_PATH, ScanCache, content_hash
+from utils import get_file_content, iter_js_files
+
+
+class SourceFile:
+    """
+    A JS file read by the engine. The content is read once and shared between
+    all the rules, the split into lines being done on first use.
+    """
+
+    def __init__(self, path, content):
+        self.path = path
+        self.content = content
+        self._lines = None
+
+    @property
+    def lines(self):
+        if self._lines is None:
+            self._lines = self.content.splitlines()
+        return self._lines
+
+
+class Rule:
+    """
+    Base class of the checks run by the engine.
+
+    `start` is called once before any file is read. Then, for every JS file
+    accepted by the rule, `scan` extracts the findings of the file and
+    `collect` turns them into errors. Finally, `finish` is called once all the
+    files were collected, for the checks that need a view over the whole tree.
+
+    As the findings are cached across runs, `scan` must only depend on the
+    file's path and content, and its results must be JSON-serializable. Any
+    change to what a rule looks for must be reflected in its `cache_key`.
+    """
+    name = None
+
+    @property
+    def cache_key(self):
+        return self.name
+
+    def start(self, errors):
+        pass
+
+    def accepts(self, path):
+        return True
+
+    def scan(self, source):
+        return None
+
+    def collect(self, path, findings, errors):
+        pass
+
+    def finish(self, errors):
+        pass
+
+    def discard(self, path, findings):
+        """
+        Reverts the effects of a previous `collect` of the findings of a file,
+        when it was changed or removed. Used by the watch mode.
+        """
+        pass
+
+    def depends_on(self, path):
+        """
+        Tells whether `start` reads the given file, in which case the rule has
+        to be started again when it changes. Used by the watch mode.
+        """
+        return False
+
+
+class Timings:
+    """
+    Accumulates the time spent in each phase of a run (discovery, read, parse,
+    check...), for benchmarking purposes.
+    """
+
+    def __init__(self):
+        self.phases = {}
+
+    def add(self, phase, start):
+        """
+        Adds the time elapsed since `start` to the phase, and returns the
+        current time to be used as start of the next phase.
+        """
+        now = time.perf_counter()
+        self.phases[phase] = self.phases.get(phase, 0.0) + now - start
+        return now
+
+    def timed_iter(self, phase, iterable):
+        iterator = iter(iterable)
+        while True:
+            start = time.perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                self.add(phase, start)
+                return
+            self.add(phase, start)
+            yield item
+
+
+def scan_file(path, rules, cached=None, timings=None):
+    """
+    Reads the given file and runs the `scan` of the rules over it.
+
+    `cached` is an optional `(hash, rule_keys)` tuple describing the findings
+    already cached for the file: as long as its content matches the hash, the
+    rules listed there are not run again.
+
+    Returns a `(hash, findings)` tuple, or None if the file could not be read.
+    """
+    start = time.perf_counter() if timings is not None else None
+    content = get_file_content(path)
+    if content is None:
+        return None
+    digest = content_hash(content)
+    if timings is not None:
+        start = timings.add('read', start)
+    skipped = cached[1] if cached is not None and cached[0] == digest else []
+    source = SourceFile(path, content)
+    findings = {rule.cache_key: rule.scan(source)
+                for rule in rules if rule.cache_key not in skipped}
+    if timings is not None:
+        timings.add('parse', start)
+    return digest, findings
+
+
+# Rules of a worker process: they are sent once by the pool's initializer
+# rather than along with every file to scan.
+_WORKER_RULES = []
+
+
+def _init_worker(rules):
+    global _WORKER_RULES
+    _WORKER_RULES = rules
+
+
+def _scan_in_worker(tasks):
+    return [scan_file(path, [_WORKER_RULES[i] for i in rule_indexes], cached)
+            for path, rule_indexes, cached in tasks]
+
+
+def _merge_findings(path, keys, result, cache):
+    if result is None:
+        return None
+    digest, findings = result
+    if cache is None:
+        return findings
+    merged = cache.lookup(path, digest, keys) or {}
+    if len(findings) > 0:
+        cache.store(path, digest, findings)
+    merged.update(findings)
+    return merged
+
+
+class _FileCheck:
+    """
+    A file to check, along with the rules accepting it and, once known, its
+    findings.
+    """
+
+    def __init__(self, path, rule_indexes, keys):
+        self.path = path
+        self.rule_indexes = rule_indexes
+        self.keys = keys
+        self.findings = None
+        self.cached = None
+        self.batch = None
+
+    def task(self):
+        return self.path, self.rule_indexes, self.cached
+
+
+class _Batch:
+    """
+    Files sent together to a worker process, to lower the cost of the
+    inter-process communication.
+    """
+    SIZE = 32
+
+    def __init__(self):
+        self.checks = []
+        self.future = None
+
+    def submit(self, executor):
+        self.future = executor.submit(_scan_in_worker, [check.task() for check in self.checks])
+
+    def resolve(self, cache):
+        for check, result in zip(self.checks, self.future.result()):
+            check.findings = _merge_findings(check.path, check.keys, result, cache)
+            check.batch = None
+
+
+def _plan_checks(rules, paths, cache):
+    """
+    Yields a _FileCheck for every file accepted by at least one rule, with its
+    findings already set if they are all available from the cache.
+    """
+    for path in paths:
+        rule_indexes = [i for i, rule in enumerate(rules) if rule.accepts(path)]
+        if len(rule_indexes) == 0:
+            continue
+        check = _FileCheck(path, rule_indexes, [rules[i].cache_key for i in rule_indexes])
+        if cache is not None:
+            findings = cache.lookup_unchanged(path, check.keys)
+            if findings is not None and len(findings) == len(check.keys):
+                check.findings = findings
+            else:
+                check.cached = cache.cached_state(path)
+        yield check
+
+
+def scan_files(rules, paths, cache=None, jobs=1, timings=None):
+    """
+    Scans the files missing from the cache, and yields a check (with `path`,
+    `rule_indexes` and `findings` attributes) for every file accepted by at
+    least one rule. The checks come in the order of `paths` with their
+    findings set (None if the file could not be read), whatever the number of
+    jobs.
+
+    The paths are consumed as they come, so that the scan starts while the
+    files are still being discovered.
+
+    The read and parse phases are only added to `timings` when running with a
+    single job, as they happen in the worker processes otherwise.
+    """
+    checks = _plan_checks(rules, paths, cache)
+    if jobs <= 1:
+        for check in checks:
+            if check.findings is None:
+                result = scan_file(check.path, [rules[i] for i in check.rule_indexes],
+                                   check.cached, timings)
+                check.findings = _merge_findings(check.path, check.keys, result, cache)
+            yield check
+        return
+
+    pending = deque()
+    batch = _Batch()
+    with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker,
+                             initargs=(rules,)) as executor:
+        for check in checks:
+            if check.findings is None:
+                check.batch = batch
+                batch.checks.append(check)
+                if len(batch.checks) == _Batch.SIZE:
+                    batch.submit(executor)
+                    batch = _Batch()
+            pending.append(check)
+            # Hand over the checks already done, without waiting
+            while len(pending) > 0:
+                head = pending[0].batch
+                if head is not None:
+                    if head.future is None or not head.future.done():
+                        break
+                    head.resolve(cache)
+                yield pending.popleft()
+        if len(batch.checks) > 0:
+            batch.submit(executor)
+        while len(pending) > 0:
+            head = pending[0].batch
+            if head is not None:
+                head.resolve(cache)
+            yield pending.popleft()
+
+
+def run_rules(rules, root='web-extension', cache=None, jobs=1, timings=None):
+    errors = []
+    start = time.perf_counter()
+    for rule in rules:
+        print("=> Starting rule '{}'...".format(rule.name))
+        rule.start(errors)
+        print("<= Done")
+    if timings is not None:
+        timings.add('start', start)
+    print("=> Checking all js files...")
+    nb_files = 0
+    paths = iter_js_files(root)
+    if timings is not None:
+        paths = timings.timed_iter('discovery', paths)
+    for check in scan_files(rules, paths, cache, jobs, timings):
+        start = time.perf_counter()
+        nb_files += 1
+        print("==> Checking '{}'...".format(check.path))
+        if check.findings is not None:
+            for i in check.rule_indexes:
+                rules[i].collect(check.path, check.findings[rules[i].cache_key], errors)
+        if timings is not None:
+            timings.add('check', start)
+    print("<= Done")
+    print("Checked {} js files".format(nb_files))
+    start = time.perf_counter()
+    for rule in rules:
+        rule.finish(errors)
+    if timings is not None:
+        timings.add('check', start)
+    return errors
+
+
+def report(errors):
+    if len(errors) > 0:
+        print("=== ERRORS ===")
+        for error in errors:
+            print("=> {}".format(error))
+    else:
+        print("=== NO ERROR FOUND ===")
+    return len(errors)
+
+
+def make_parser(description=None):
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument('--no-cache', action='store_true',
+                        help='Scan all the files, ignoring (and not updating) the cache')
+    parser.add_argument('--cache-path', default=CACHE_PATH,
+                        help='Path of the cache file (default: {})'.format(CACHE_PATH))
+    parser.add_argument('-j', '--jobs', type=int, default=1,
+                        help='Number of processes scanning the files (0 for one per CPU)')
+    parser.add_argument('--watch', action='store_true',
+                        help='Keep running, checking again the files as they change')
+    parser.add_argument('--poll', action='store_true',
+                        help='In watch mode, poll the files rather than using inotify')
+    return parser
+
+
+def main_func(rules, argv=None, root='web-extension', args=None):
+    """
+    Runs the rules and reports their errors. The command line is parsed from
+    `argv` unless already parsed arguments (from a parser built with
+    `make_parser`) are given through `args`.
+    """
+    if args is None:
+        args = make_parser().parse_args(argv)
+    cache = None
+    if not args.no_cache:
+        cache = ScanCache(args.cache_path).load()
+    jobs = args.jobs if args.jobs > 0 else (os.cpu_count() or 1)
+    if args.watch:
+        # Imported here as the watch mode is only used in development
+        from watch import watch
+        return watch(rules, root, cache, jobs, args.poll)
+    errors = run_rules(rules, root, cache, jobs)
+    if cache is not None:
+        cache.save()
+    return report(errors)
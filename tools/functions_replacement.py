@@ -1,6 +1,13 @@
+from bisect import bisect_right
+import hashlib
+import json
+import re
 import sys
-from utils import get_all_js_files, get_file_content
+from engine import Rule, main_func as run_main
 
+# Every entry matches calls to the function named by its key, unless it
+# provides its own regex through a 'pattern' key (for property assignments for
+# example).
 FUNCTIONS_TO_NOT_CALL = {
     'Array.prototype.slice.call': {
         'to_ignore': ['web-extension/utils.js'],
@@ -9,47 +16,103 @@ FUNCTIONS_TO_NOT_CALL = {
 }
 
 
-def check_file(path, errors):
-    functions = []
-    for key in FUNCTIONS_TO_NOT_CALL:
-        files_to_ignore = FUNCTIONS_TO_NOT_CALL[key]['to_ignore']
-        for f in files_to_ignore:
-            if not path.endswith(f):
-                functions.append(['{}('.format(key), key, FUNCTIONS_TO_NOT_CALL[key]['replacement']])
-    if len(functions) == 0:
+class FunctionsMatcher:
+    """
+    Compiles a table such as FUNCTIONS_TO_NOT_CALL into a single regex, which
+    is matched over the whole content of a file at once: the cost of a scan
+    hardly depends on the number of entries in the table.
+    """
+
+    def __init__(self, table):
+        self._entries = [(key, entry['replacement'], entry['to_ignore'])
+                         for key, entry in table.items()]
+        alternatives = ['(?P<f{}>{})'.format(index, entry.get('pattern',
+                                                             re.escape('{}('.format(key))))
+                        for index, (key, entry) in enumerate(table.items())]
+        # The lookahead makes the regex consume nothing, so that overlapping
+        # matches of different entries are all found.
+        self._regex = None
+        if len(alternatives) > 0:
+            self._regex = re.compile('(?={})'.format('|'.join(alternatives)))
+
+    def __len__(self):
+        return len(self._entries)
+
+    def ignored_entries(self, path):
+        return set(index for index, (_, _, to_ignore) in enumerate(self._entries)
+                   if any(path.endswith(f) for f in to_ignore))
+
+    def find(self, content, ignored=()):
+        """
+        Returns the sorted list of the `(line, key, replacement)` found in the
+        content, skipping commented lines and the ignored entries.
+        """
+        if self._regex is None:
+            return []
+        line_starts = None
+        found = set()
+        for match in self._regex.finditer(content):
+            index = int(match.lastgroup[1:])
+            if index in ignored:
+                continue
+            # Line offsets are only computed for the files with a match.
+            if line_starts is None:
+                line_starts = [0] + [m.end() for m in re.finditer('\n', content)]
+            line = bisect_right(line_starts, match.start())
+            if (line, index) in found:
+                continue
+            if content[line_starts[line - 1]:match.start()].lstrip().startswith('//'):
+                continue
+            found.add((line, index))
+        return [(line, self._entries[index][0], self._entries[index][1])
+                for line, index in sorted(found)]
+
+
+_MATCHER = None
+
+
+def get_matcher():
+    global _MATCHER
+    if _MATCHER is None:
+        _MATCHER = FunctionsMatcher(FUNCTIONS_TO_NOT_CALL)
+    return _MATCHER
+
+
+def check_file(source, errors, matcher=None):
+    if matcher is None:
+        matcher = get_matcher()
+    path = source.path
+    ignored = matcher.ignored_entries(path)
+    if len(ignored) == len(matcher):
         print('Ignoring file "{}": nothing to check in there!'.format(path))
-    content = get_file_content(path)
-    if content is None:
         return
-    for index, line in enumerate(content.splitlines()):
-        line = line.strip()
-        if line.startswith('//'):
-            continue
-        for function in functions:
-            if function[0] in line:
-                errors.append('[{}:{}]: "{}" should be replaced with "{}"'.format(path, index + 1,
-                                                                                  function[1],
-                                                                                  function[2]))
-
-
-def main_func():
-    errors = []
-    print("=> Getting all js files...")
-    all_js_files = get_all_js_files('web-extension')
-    print("<= Done")
-    print("Found {} js files".format(len(all_js_files)))
-    print("=> Checking all js files...")
-    for js_file in all_js_files:
-        print("==> Checking '{}'...".format(js_file))
-        check_file(js_file, errors)
-    print("<= Done")
-    if len(errors) > 0:
-        print("=== ERRORS ===")
-        for error in errors:
-            print("=> {}".format(error))
-    else:
-        print("=== NO ERROR FOUND ===")
-    return len(errors)
+    for line, key, replacement in matcher.find(source.content, ignored):
+        errors.append('[{}:{}]: "{}" should be replaced with "{}"'.format(path, line, key,
+                                                                          replacement))
+
+
+class FunctionsReplacementRule(Rule):
+    name = 'functions replacement'
+
+    def __init__(self):
+        self._matcher = get_matcher()
+
+    @property
+    def cache_key(self):
+        table = json.dumps(FUNCTIONS_TO_NOT_CALL, sort_keys=True)
+        return '{}:{}'.format(self.name, hashlib.sha1(table.encode('utf-8')).hexdigest()[:12])
+
+    def scan(self, source):
+        errors = []
+        check_file(source, errors, self._matcher)
+        return errors
+
+    def collect(self, path, findings, errors):
+        errors.extend(findings)
+
+
+def main_func(argv=None):
+    return run_main([FunctionsReplacementRule()], argv)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,147 @@
+"""
+Small tokenizer for JS sources, only precise enough to extract literals
+(strings, object literals) and the identifiers around them.
+"""
+from collections import namedtuple
+import re
+
+
+Token = namedtuple('Token', ['kind', 'value', 'line'])
+
+TOKEN_REGEX = re.compile(r'''
+    (?P<space>\s+)
+  | (?P<comment>//[^\n]*|/\*.*?\*/)
+  | (?P<string>'(?:[^'\\\n]|\\.)*'|"(?:[^"\\\n]|\\.)*")
+  | (?P<template>`(?:[^`\\]|\\.)*`)
+  | (?P<name>[A-Za-z_$][\w$]*)
+  | (?P<number>\d[\w.]*)
+  | (?P<punct>[^\s\w])
+''', re.S | re.X)
+REGEX_LITERAL = re.compile(r'/(?:[^/\\\n\[]|\\.|\[(?:[^\]\\\n]|\\.)*\])+/[a-z]*')
+# Keywords after which a `/` starts a regex literal rather than a division
+REGEX_KEYWORDS = {'return', 'typeof', 'case', 'do', 'else', 'in', 'of', 'new', 'delete', 'void',
+                  'throw', 'instanceof', 'yield', 'await'}
+ESCAPES = {'n': '\n', 't': '\t', 'r': '\r', 'b': '\b', 'f': '\f', 'v': '\v', '0': '\0'}
+ESCAPE_REGEX = re.compile(r'\\(u\{[0-9a-fA-F]+\}|u[0-9a-fA-F]{4}|x[0-9a-fA-F]{2}|\n|.)', re.S)
+
+
+class TokenizeError(Exception):
+    def __init__(self, msg):
+        super(TokenizeError, self).__init__(msg)
+
+
+def _regex_allowed(previous):
+    if previous is None:
+        return True
+    if previous.kind == 'punct':
+        return previous.value not in ')]}'
+    return previous.kind == 'name' and previous.value in REGEX_KEYWORDS
+
+
+def tokenize(content):
+    """
+    Returns the list of the significant tokens (everything but spaces and
+    comments) of the given JS source.
+    """
+    tokens = []
+    line = 1
+    pos = 0
+    previous = None
+    while pos < len(content):
+        if content[pos] == '/' and _regex_allowed(previous):
+            match = REGEX_LITERAL.match(content, pos)
+            if match is not None and not content.startswith(('//', '/*'), pos):
+                previous = Token('regex', match.group(), line)
+                tokens.append(previous)
+                pos = match.end()
+                continue
+        match = TOKEN_REGEX.match(content, pos)
+        if match is None:
+            raise TokenizeError('Unexpected character at line {}'.format(line))
+        kind = match.lastgroup
+        text = match.group()
+        if kind not in ('space', 'comment'):
+            previous = Token(kind, text, line)
+            tokens.append(previous)
+        line += text.count('\n')
+        pos = match.end()
+    return tokens
+
+
+def _unescape(match):
+    escape = match.group(1)
+    if escape.startswith('u{'):
+        return chr(int(escape[2:-1], 16))
+    if escape[0] in 'ux' and len(escape) > 1:
+        return chr(int(escape[1:], 16))
+    if escape == '\n':
+        # Line continuation
+        return ''
+    return ESCAPES.get(escape, escape)
+
+
+def unquote(literal):
+    """
+    Returns the value of a JS string literal.
+    """
+    return ESCAPE_REGEX.sub(_unescape, literal[1:-1])
+
+
+def string_value(token):
+    return unquote(token.value)
+
+
+def _token_at(tokens, index):
+    if index >= len(tokens):
+        raise TokenizeError('Unexpected end of input after line {}'.format(
+            tokens[-1].line if tokens else 1))
+    return tokens[index]
+
+
+def parse_literal(tokens, index):
+    """
+    Parses the literal value starting at `tokens[index]`, and returns it along
+    with the index of the token following it.
+
+    Strings (concatenated with `+` or not), numbers and identifiers are
+    returned as Python values, while object literals are returned as a list of
+    `(key, line, value)` tuples, to keep the location of their entries.
+    """
+    token = _token_at(tokens, index)
+    if token.kind == 'punct' and token.value == '{':
+        entries = []
+        index += 1
+        while not (_token_at(tokens, index).kind == 'punct' and tokens[index].value == '}'):
+            key = tokens[index]
+            if (key.kind not in ('string', 'name', 'number')
+                    or _token_at(tokens, index + 1).value != ':'):
+                raise TokenizeError('Unexpected object key {} at line {}'.format(key.value,
+                                                                               key.line))
+            value, index = parse_literal(tokens, index + 2)
+            entries.append((string_value(key) if key.kind == 'string' else key.value, key.line,
+                            value))
+            if _token_at(tokens, index).kind == 'punct' and tokens[index].value == ',':
+                index += 1
+        return entries, index + 1
+    if token.kind == 'string':
+        value = string_value(token)
+        index += 1
+        while (index + 1 < len(tokens) and tokens[index].value == '+'
+               and tokens[index + 1].kind == 'string'):
+            value += string_value(tokens[index + 1])
+            index += 2
+        return value, index
+    if token.kind in ('number', 'name'):
+        return token.value, index + 1
+    raise TokenizeError('Unexpected token {} at line {}'.format(token.value, token.line))
+
+
+def find_sequence(tokens, values, start=0):
+    """
+    Returns the index of the first token following the given sequence of token
+    values, or -1 if it could not be found.
+    """
+    for index in range(start, len(tokens) - len(values) + 1):
+        if all(tokens[index + i].value == value for i, value in enumerate(values)):
+            return index + len(values)
+    return -1
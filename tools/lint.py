@@ -0,0 +1,21 @@
+"""
+Runs all the JS code checkers in a single pass over the web-extension files.
+"""
+import sys
+from engine import main_func as run_main
+from functions_replacement import FunctionsReplacementRule
+from logs_codes import CodesRule
+
+
+RULES = [
+    CodesRule,
+    FunctionsReplacementRule,
+]
+
+
+def main_func(argv=None):
+    return run_main([rule() for rule in RULES], argv)
+
+
+if __name__ == "__main__":
+    sys.exit(main_func())
@@ -1,137 +1,213 @@
-from utils import get_all_js_files, get_file_content
+from bisect import bisect_right
+import json
+import os
+import re
 import sys
 
+from utils import get_file_content
+from engine import Rule, main_func as run_main, make_parser
+from js_tokens import TokenizeError, find_sequence, parse_literal, tokenize, unquote
+
 
 STRINGS_PATH = 'web-extension/strings.js'
+# Calls to a method of LOGS or LOCALIZATION with a string literal as first
+# argument: the code used.
+USAGE_REGEX = re.compile(r'''\b(?:LOGS|LOCALIZATION)\s*\.\s*[\w$]+\s*\(\s*
+                             ('(?:[^'\\\n]|\\.)*'|"(?:[^"\\\n]|\\.)*")''', re.X)
 
 
-def check_error_codes(file_path, error_codes, string_codes, errors):
-    content = get_file_content(file_path)
-    if content is None:
-        return
-    for index, line in enumerate(content.splitlines()):
-        line = line.strip()
-        start_log = 'LOGS.' in line
-        start_loc = 'LOCALIZATION.' in line
-        if start_loc or start_log:
-            line = line.split('LOGS.')[1] if start_log else line.split('LOCALIZATION.')[1]
-            code = line.split("'")
-            if len(code) < 2:
-                continue
-            code = code[1].split("'")[0]
-            if code.startswith('E'):
-                if code not in error_codes:
-                    errors.append('[{}:{}]: Unknown error code "{}"'.format(file_path, index + 1,
-                                                                            code))
-                else:
-                    error_codes[code]['usage'] += 1
-                    if error_codes[code]['string'] not in string_codes:
-                        errors.append('[{}:{}]: Unknown string code "{}" used in error code "{}"'
-                                      .format(file_path, index + 1, error_codes[code]['string'],
-                                              code))
-            elif code.startswith('S'):
-                if code not in string_codes:
-                    errors.append('[{}:{}]: Unknown string code "{}"'.format(file_path, index + 1,
-                                                                             code))
-                else:
-                    string_codes[code]['usage'] += 1
-
-
-def get_all_defined_strings_and_error_codes(errors):
+def extract_codes(source):
+    """
+    Returns the list of the `[line, code]` used through LOGS or LOCALIZATION in
+    the given file, skipping commented lines.
+
+    Running the tokenizer over every file would be much slower, so a regex
+    spanning the call is matched over the content instead.
+    """
+    usages = []
+    content = source.content
+    line_starts = None
+    for match in USAGE_REGEX.finditer(content):
+        # Line offsets are only computed for the files with a match.
+        if line_starts is None:
+            line_starts = [0] + [m.end() for m in re.finditer('\n', content)]
+        line = bisect_right(line_starts, match.start())
+        if content[line_starts[line - 1]:match.start()].lstrip().startswith('//'):
+            continue
+        usages.append([line, unquote(match.group(1))])
+    return usages
+
+
+def check_error_codes(file_path, usages, error_codes, string_codes, errors):
+    for line, code in usages:
+        if code.startswith('E'):
+            if code not in error_codes:
+                errors.append('[{}:{}]: Unknown error code "{}"'.format(file_path, line, code))
+            else:
+                error_codes[code]['usage'] += 1
+                error_codes[code]['usages'].append([file_path, line])
+                if error_codes[code]['string'] not in string_codes:
+                    errors.append('[{}:{}]: Unknown string code "{}" used in error code "{}"'
+                                  .format(file_path, line, error_codes[code]['string'], code))
+        elif code.startswith('S'):
+            if code not in string_codes:
+                errors.append('[{}:{}]: Unknown string code "{}"'.format(file_path, line, code))
+            else:
+                string_codes[code]['usage'] += 1
+                string_codes[code]['usages'].append([file_path, line])
+
+
+def parse_definitions(content, strings_path=STRINGS_PATH):
+    """
+    Returns the `(error_codes, string_codes)` lists of entries of the ERRORS
+    and STRINGS tables defined in the content of `strings.js`, as
+    `(code, line, value)` tuples. The value of an error code is the string
+    code it uses, while the value of a string code is the dict of its
+    translations.
+    """
+    tokens = tokenize(content)
+    tables = []
+    for name in ('ERRORS', 'STRINGS'):
+        index = find_sequence(tokens, ['this', '.', name, '=', '{'])
+        if index == -1:
+            raise TokenizeError('Could not find the {} table in {}'.format(name, strings_path))
+        entries, _ = parse_literal(tokens, index - 1)
+        if name == 'STRINGS':
+            entries = [(code, line, {lang: text for lang, _, text in value})
+                       for code, line, value in entries]
+        tables.append(entries)
+    return tables[0], tables[1]
+
+
+def get_all_defined_strings_and_error_codes(errors, strings_path=STRINGS_PATH):
+    """
+    Returns the dicts describing the error codes and the string codes defined
+    in `strings.js`. The usage of a string code starts at the number of error
+    codes using it.
+    """
     error_codes = {}
     string_codes = {}
-    is_in_errors = False
-    is_reading_errors = False
-    is_in_logs = False
-    is_reading_logs = False
 
-    content = get_file_content(STRINGS_PATH)
+    content = get_file_content(strings_path)
     if content is None:
         return error_codes, string_codes
-    for index, line in enumerate(content.splitlines()):
-        line = line.strip()
-        if is_reading_errors is True:
-            if line.startswith("//"):
-                continue
-            if not line.startswith("'E"):
-                is_reading_errors = False
-                is_in_errors = False
-                continue
-            error_code = line.split("'")[1].split("'")[0]
-            string_code = line.split(":")[1].split("'")[1].split("'")[0]
-            if error_code in error_codes:
-                errors.append("[{}:{}]: error code '{}' is duplicated with line {}"
-                              .format(STRINGS_PATH, index + 1, error_code,
-                                      error_codes[error_code]['line']))
-                continue
-            error_codes[error_code] = {'line': index + 1, 'string': string_code, 'usage': 0}
-            entry = string_codes.setdefault(string_code, {'usage': 0})
-            entry['usage'] += 1
-            string_codes[string_code] = entry
-        elif is_in_errors is True:
-            is_reading_errors = line.startswith('this.ERRORS = {')
-        elif line.startswith('function Logs('):
-            is_in_logs = False
-            is_in_errors = True
-        elif is_reading_logs:
-            if line.startswith("//"):
-                continue
-            if line.startswith('};'):
-                is_reading_logs = False
-                is_in_logs = False
-                continue
-            if not line.startswith("'S"):
-                continue
-            string_code = line.split("'")[1].split("'")[0]
-            if string_code in string_codes:
-                errors.append("[{}:{}]: string code '{}' is duplicated with line {}"
-                              .format(STRINGS_PATH, index + 1, string_code,
-                                      string_codes[string_code]['line']))
-                continue
-            entry = string_codes.setdefault(string_code, {'usage': 0})
-            entry.update({'line': index + 1, 'usage': entry['usage'] + 1})
-            string_codes[string_code] = entry
-        elif is_in_logs is True:
-            is_reading_logs = line.startswith('this.STRINGS = {')
-        elif line.startswith('function Localization('):
-            is_in_logs = True
-            is_in_errors = False
+    try:
+        error_entries, string_entries = parse_definitions(content, strings_path)
+    except TokenizeError as e:
+        errors.append('[{}]: {}'.format(strings_path, e))
+        return error_codes, string_codes
+    for string_code, line, texts in string_entries:
+        if string_code in string_codes:
+            errors.append("[{}:{}]: string code '{}' is duplicated with line {}"
+                          .format(strings_path, line, string_code,
+                                  string_codes[string_code]['line']))
+            continue
+        string_codes[string_code] = {'line': line, 'texts': texts, 'usage': 0, 'usages': []}
+    for error_code, line, string_code in error_entries:
+        if error_code in error_codes:
+            errors.append("[{}:{}]: error code '{}' is duplicated with line {}"
+                          .format(strings_path, line, error_code,
+                                  error_codes[error_code]['line']))
+            continue
+        error_codes[error_code] = {'line': line, 'string': string_code, 'usage': 0,
+                                   'usages': []}
+        if string_code in string_codes:
+            string_codes[string_code]['usage'] += 1
+        else:
+            errors.append("[{}:{}]: Unknown string code '{}' used by error code '{}'"
+                          .format(strings_path, line, string_code, error_code))
 
     return error_codes, string_codes
 
 
-def check_usage(codes, kind, errors):
+def check_usage(codes, kind, errors, strings_path=STRINGS_PATH):
     for key in codes:
         if codes[key]['usage'] == 0:
-            errors.append('Unused {}: "{}" from [{}:{}]'.format(kind, key, STRINGS_PATH,
+            errors.append('Unused {}: "{}" from [{}:{}]'.format(kind, key, strings_path,
                                                                 codes[key]['line']))
 
 
-def main_func():
-    errors = []
-    print("=> Getting error codes and string codes...")
-    error_codes, string_codes = get_all_defined_strings_and_error_codes(errors)
-    print("<= Done")
-    print("Found {} error codes".format(len(error_codes)))
-    print("Found {} string codes".format(len(string_codes)))
-    print("=> Getting all js files...")
-    all_js_files = get_all_js_files('web-extension', STRINGS_PATH)
-    print("<= Done")
-    print("Found {} js files".format(len(all_js_files)))
-    print("=> Checking all js files...")
-    for js_file in all_js_files:
-        print("==> Checking '{}'...".format(js_file))
-        check_error_codes(js_file, error_codes, string_codes, errors)
-    print("<= Done")
-    check_usage(string_codes, 'string code', errors)
-    check_usage(error_codes, 'error code', errors)
-    if len(errors) > 0:
-        print("=== ERRORS ===")
-        for error in errors:
-            print("=> {}".format(error))
-    else:
-        print("=== NO ERROR FOUND ===")
-    return len(errors)
+class CodesRule(Rule):
+    name = 'logs codes'
+
+    def __init__(self, strings_path=STRINGS_PATH):
+        self.strings_path = strings_path
+        self.error_codes = {}
+        self.string_codes = {}
+
+    def start(self, errors):
+        print("=> Getting error codes and string codes...")
+        self.error_codes, self.string_codes = get_all_defined_strings_and_error_codes(
+            errors, self.strings_path)
+        print("<= Done")
+        print("Found {} error codes".format(len(self.error_codes)))
+        print("Found {} string codes".format(len(self.string_codes)))
+
+    def accepts(self, path):
+        return not path.endswith(self.strings_path)
+
+    def scan(self, source):
+        return extract_codes(source)
+
+    def collect(self, path, findings, errors):
+        check_error_codes(path, findings, self.error_codes, self.string_codes, errors)
+
+    def finish(self, errors):
+        check_usage(self.string_codes, 'string code', errors, self.strings_path)
+        check_usage(self.error_codes, 'error code', errors, self.strings_path)
+
+    def discard(self, path, findings):
+        for line, code in findings:
+            codes = self.error_codes if code.startswith('E') else self.string_codes
+            if code in codes and [path, line] in codes[code]['usages']:
+                codes[code]['usage'] -= 1
+                codes[code]['usages'].remove([path, line])
+
+    def depends_on(self, path):
+        return os.path.abspath(path) == os.path.abspath(self.strings_path)
+
+
+def export_index(rule, path):
+    """
+    Writes the index of the codes (definition, string used and usage sites)
+    built by the rule as JSON, so that it can be queried without rescanning
+    the sources.
+    """
+    index = {
+        'strings_path': rule.strings_path,
+        'error_codes': {code: {'line': entry['line'], 'string': entry['string'],
+                               'usages': entry['usages']}
+                        for code, entry in rule.error_codes.items()},
+        'string_codes': {code: {'line': entry['line'], 'texts': entry['texts'],
+                                'usages': entry['usages'],
+                                'error_codes': sorted(error_code for error_code, error
+                                                      in rule.error_codes.items()
+                                                      if error['string'] == code)}
+                         for code, entry in rule.string_codes.items()},
+    }
+    try:
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, 'w') as f:
+            json.dump(index, f, indent=2, sort_keys=True)
+        print("Codes index written into '{}'".format(path))
+        return 0
+    except OSError as e:
+        print('Failed to write codes index into "{}": {}'.format(path, e))
+        return 1
+
+
+def main_func(argv=None):
+    parser = make_parser()
+    parser.add_argument('--export-index', metavar='PATH',
+                        help='Write the index of the codes and their usages as JSON into PATH')
+    args = parser.parse_args(argv)
+    rule = CodesRule()
+    ret = run_main([rule], args=args)
+    if args.export_index:
+        ret += export_index(rule, args.export_index)
+    return ret
 
 
 if __name__ == "__main__":
@@ -0,0 +1,128 @@
+"""
+Renders the `manifest.json` of the web-extension for a browser.
+
+The manifest is made of:
+ - `browsers/base.json`: the part shared by all the browsers
+ - `browsers/content_scripts.json`: the list of the scripts injected in the
+   reader pages, where `{reader}` is replaced by the name of the reader, along
+   with the URL patterns of every reader and the path of its bundle (the
+   scripts concatenated by bundler.py, injected instead of them by default)
+ - `browsers/<browser>.json`: the overlay of the browser, merged over the rest
+"""
+import argparse
+import json
+import sys
+
+from utils import write_if_changed
+
+
+BROWSERS_DIR = 'browsers'
+MANIFEST_PATH = 'web-extension/manifest.json'
+
+
+class ManifestError(Exception):
+    def __init__(self, msg):
+        super(ManifestError, self).__init__(msg)
+
+
+def load_json(path):
+    try:
+        with open(path, 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        raise ManifestError('Failed to load "{}": {}'.format(path, e))
+
+
+def merge(base, overlay):
+    """
+    Returns `base` with the values of `overlay` merged over it: objects are
+    merged recursively, while any other value replaces the one of `base`.
+    """
+    merged = dict(base)
+    for key, value in overlay.items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key] = merge(merged[key], value)
+        else:
+            merged[key] = value
+    return merged
+
+
+def reader_scripts(definition):
+    """
+    Returns the list of the scripts injected in the pages of every reader.
+    """
+    return {reader: [script.format(reader=reader) for script in definition['js']]
+            for reader in definition['readers']}
+
+
+def content_scripts(definition, bundled=True):
+    """
+    Returns the `content_scripts` entries of the manifest: a single entry per
+    reader, injecting either its bundle (see bundler.py) or all its scripts.
+    """
+    scripts = reader_scripts(definition)
+    return [{
+        'matches': matches,
+        'js': [definition['bundle'].format(reader=reader)] if bundled else scripts[reader],
+        'all_frames': definition['all_frames'],
+    } for reader, matches in definition['readers'].items()]
+
+
+def render_data(browser, browsers_dir=BROWSERS_DIR, bundled=True):
+    base = load_json('{}/base.json'.format(browsers_dir))
+    definition = load_json('{}/content_scripts.json'.format(browsers_dir))
+    overlay = load_json('{}/{}.json'.format(browsers_dir, browser))
+    base['content_scripts'] = content_scripts(definition, bundled)
+    return merge(base, overlay)
+
+
+def render(browser, browsers_dir=BROWSERS_DIR, bundled=True):
+    return json.dumps(render_data(browser, browsers_dir, bundled), indent=4) + '\n'
+
+
+def write_manifest(browser, path=MANIFEST_PATH, browsers_dir=BROWSERS_DIR, bundled=True):
+    """
+    Renders the manifest of the browser into `path`. The file is only written
+    when its content changes, so that the extension is not reloaded for
+    nothing by the tools watching it.
+    """
+    try:
+        content = render(browser, browsers_dir, bundled)
+    except ManifestError as e:
+        print(e)
+        print('aborting...')
+        return 3
+    try:
+        written = write_if_changed(content, path)
+    except OSError as e:
+        print('Failed to write into "{}": {}'.format(path, e))
+        return 4
+    if written:
+        print("Manifest for {} written into '{}'".format(browser, path))
+    else:
+        print("Manifest for {} already up-to-date in '{}'".format(browser, path))
+    return 0
+
+
+def main_func(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('browser', choices=['firefox', 'chrome'])
+    parser.add_argument('--no-bundle', action='store_true',
+                        help='Inject the content scripts one by one rather than their bundle')
+    parser.add_argument('-o', '--output', default=MANIFEST_PATH,
+                        help='Path of the manifest (default: {}), "-" for stdout'
+                             .format(MANIFEST_PATH))
+    args = parser.parse_args(argv)
+    if args.output == '-':
+        try:
+            sys.stdout.write(render(args.browser, bundled=not args.no_bundle))
+        except ManifestError as e:
+            print(e)
+            return 3
+        return 0
+    return write_manifest(args.browser, args.output, bundled=not args.no_bundle)
+
+
+if __name__ == "__main__":
+    sys.exit(main_func())
@@ -0,0 +1,160 @@
+"""
+Packs the web-extension into one zip archive per browser.
+
+The manifest of each browser and the generated files are written straight into
+the archives, leaving the working copy untouched. The archives are
+reproducible: their entries are sorted and all get the same timestamp, so the
+same inputs always give the same bytes. The hash of the inputs is stored next
+to each archive, and an archive is only built again when it changes.
+"""
+from concurrent.futures import ThreadPoolExecutor
+import hashlib
+import json
+import os
+import zipfile
+
+from bundler import BUNDLES_DIR, build_bundles
+from manifest import ManifestError, render
+from strings_compiler import COMPILED_PATH, generate
+from utils import DEFAULT_EXCLUDES, iter_files
+
+
+SOURCE_DIR = 'web-extension'
+BUILD_DIR = 'build'
+BROWSERS = ['firefox', 'chrome']
+# Same as the files ignored by `web-ext build`
+EXCLUDES = DEFAULT_EXCLUDES + ['.*', '*.zip', '*.xpi']
+# Oldest date a zip entry can hold
+ZIP_DATE = (1980, 1, 1, 0, 0, 0)
+# To be bumped whenever the layout of the archives changes
+PACKAGER_VERSION = 1
+
+
+def archive_name(manifest):
+    return '{}-{}.zip'.format(manifest['name'].lower(), manifest['version'])
+
+
+def read_sources(source_dir=SOURCE_DIR):
+    """
+    Returns the content of every file to pack, keyed by its path in the
+    archive. The manifest and the generated files are left out, as they are
+    added for each browser.
+    """
+    generated = {'manifest.json', os.path.relpath(COMPILED_PATH, SOURCE_DIR)}
+    sources = {}
+    for path in iter_files(source_dir, exclude=EXCLUDES):
+        name = os.path.relpath(path, source_dir).replace(os.sep, '/')
+        if name in generated or name.startswith('{}/'.format(BUNDLES_DIR)):
+            continue
+        with open(path, 'rb') as f:
+            sources[name] = f.read()
+    return sources
+
+
+def inputs_hash(entries):
+    digest = hashlib.sha1('packager:{}'.format(PACKAGER_VERSION).encode('utf-8'))
+    for name in sorted(entries):
+        digest.update(name.encode('utf-8') + b'\0')
+        digest.update(hashlib.sha1(entries[name]).digest())
+    return digest.hexdigest()
+
+
+def write_archive(entries, path):
+    """
+    Writes the entries into a zip archive, in a reproducible way. The archive
+    is written under a temporary name first, so that an interrupted build
+    never leaves a truncated archive behind.
+    """
+    tmp_path = '{}.tmp'.format(path)
+    with zipfile.ZipFile(tmp_path, 'w', zipfile.ZIP_DEFLATED) as archive:
+        for name in sorted(entries):
+            info = zipfile.ZipInfo(name, ZIP_DATE)
+            info.compress_type = zipfile.ZIP_DEFLATED
+            info.external_attr = 0o644 << 16
+            archive.writestr(info, entries[name])
+    os.replace(tmp_path, path)
+
+
+class Package:
+    def __init__(self, browser, manifest, entries, dest):
+        self.browser = browser
+        self.entries = entries
+        self.directory = os.path.join(dest, browser)
+        self.path = os.path.join(self.directory, archive_name(manifest))
+        self.stamp_path = '{}.sha1'.format(self.path)
+        self.hash = inputs_hash(entries)
+
+    def is_up_to_date(self):
+        try:
+            with open(self.stamp_path, 'r') as f:
+                return f.read().strip() == self.hash and os.path.isfile(self.path)
+        except OSError:
+            return False
+
+    def build(self):
+        os.makedirs(self.directory, exist_ok=True)
+        write_archive(self.entries, self.path)
+        with open(self.stamp_path, 'w') as f:
+            f.write('{}\n'.format(self.hash))
+
+
+def make_package(browser, sources, generated, dest):
+    content = render(browser)
+    entries = dict(sources)
+    entries.update(generated)
+    entries['manifest.json'] = content.encode('utf-8')
+    return Package(browser, json.loads(content), entries, dest)
+
+
+def generate_files(sources):
+    """
+    Returns the content of the generated files (compiled strings and bundles)
+    keyed by their path in the archive, or None if the strings could not be
+    compiled.
+    """
+    compiled = generate(SOURCE_DIR)
+    if compiled is None:
+        return None
+    generated = {os.path.relpath(COMPILED_PATH, SOURCE_DIR): compiled[0]}
+    generated.update(build_bundles(
+        lambda script: generated[script] if script in generated
+        else sources[script].decode('utf-8')))
+    return {name: content.encode('utf-8') for name, content in generated.items()}
+
+
+def build(browsers=None, dest=BUILD_DIR, force=False):
+    """
+    Builds the archive of every browser, in parallel (the compression
+    releases the GIL). Returns the number of archives which failed to build.
+    """
+    if browsers is None:
+        browsers = BROWSERS
+    try:
+        sources = read_sources()
+        generated = generate_files(sources)
+        if generated is None:
+            return len(browsers)
+        packages = [make_package(browser, sources, generated, dest) for browser in browsers]
+    except (OSError, KeyError, ManifestError) as e:
+        print('Failed to read the sources: {}'.format(e))
+        return len(browsers)
+
+    to_build = []
+    for package in packages:
+        if not force and package.is_up_to_date():
+            print("=> [{}] '{}' is up-to-date".format(package.browser, package.path))
+        else:
+            to_build.append(package)
+    failures = 0
+    with ThreadPoolExecutor(max_workers=max(len(to_build), 1)) as executor:
+        futures = [(package, executor.submit(package.build)) for package in to_build]
+        for package, future in futures:
+            try:
+                future.result()
+                print("=> [{}] Built '{}' ({} files)".format(package.browser, package.path,
+                                                          len(package.entries)))
+            except OSError as e:
+                print("=> [{}] Failed to build '{}': {}".format(package.browser, package.path,
+                                                              e))
+                failures += 1
+    return failures
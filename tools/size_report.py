@@ -0,0 +1,96 @@
+"""
+Reports how many bytes of content scripts every reader page pays for, as
+injected by the manifest of every browser, along with a rough estimate of
+the time spent parsing them.
+
+The scripts of an entry with `all_frames` are injected in every frame of the
+page, so their size is multiplied by the number of frames given with
+`--frames`. Fails when the bytes injected in a page exceed the budget.
+"""
+import argparse
+import sys
+
+from manifest import ManifestError, render_data
+from packager import BROWSERS, generate_files, read_sources
+
+
+# Frames assumed in a reader page (the page itself, the sidebar and ads)
+DEFAULT_FRAMES = 4
+# Budget of the bytes of content scripts injected in a page, in KB
+DEFAULT_BUDGET_KB = 512
+# Rough parse (and compile) speed of the JS engines on a desktop computer, in
+# KB per millisecond
+PARSE_KB_PER_MS = 10
+
+
+class PageSize:
+    def __init__(self, browser, match, scripts, files, frames):
+        self.browser = browser
+        self.match = match
+        self.scripts = scripts
+        self.frame_bytes = sum(len(files[script]) for script in scripts)
+        self.frames = frames
+        self.page_bytes = self.frame_bytes * frames
+
+    @property
+    def parse_ms(self):
+        return self.page_bytes / 1024 / PARSE_KB_PER_MS
+
+
+def page_sizes(browser, files, frames=DEFAULT_FRAMES, bundled=True):
+    manifest = render_data(browser, bundled=bundled)
+    return [PageSize(browser, match, entry['js'], files,
+                     frames if entry.get('all_frames', False) else 1)
+            for entry in manifest['content_scripts']
+            for match in entry['matches']]
+
+
+def print_report(sizes, budget_kb):
+    print("{:<8} {:<28} {:>7} {:>10} {:>6} {:>10} {:>9}".format(
+        'browser', 'match', 'scripts', 'frame (KB)', 'frames', 'page (KB)', 'parse'))
+    for size in sizes:
+        print("{:<8} {:<28} {:>7} {:>10.1f} {:>6} {:>10.1f} {:>7.1f}ms{}".format(
+            size.browser, size.match, len(size.scripts), size.frame_bytes / 1024, size.frames,
+            size.page_bytes / 1024, size.parse_ms,
+            '  OVER BUDGET' if size.page_bytes > budget_kb * 1024 else ''))
+
+
+def main_func(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--browser', default=','.join(BROWSERS),
+                        type=lambda value: value.split(','),
+                        help='Comma-separated list of the browsers to report on')
+    parser.add_argument('--frames', type=int, default=DEFAULT_FRAMES,
+                        help='Number of frames of a reader page (default: {})'
+                             .format(DEFAULT_FRAMES))
+    parser.add_argument('--budget-kb', type=float, default=DEFAULT_BUDGET_KB,
+                        help='Maximum KB of content scripts injected in a page (default: {})'
+                             .format(DEFAULT_BUDGET_KB))
+    parser.add_argument('--no-bundle', action='store_true',
+                        help='Report on the scripts injected one by one rather than bundled')
+    args = parser.parse_args(argv)
+
+    try:
+        files = read_sources()
+        generated = generate_files(files)
+        if generated is None:
+            return 1
+        files.update(generated)
+        sizes = [size for browser in args.browser
+                 for size in page_sizes(browser, files, args.frames, not args.no_bundle)]
+    except (OSError, KeyError, ManifestError) as e:
+        print('Failed to resolve the content scripts: {}'.format(e))
+        return 1
+    print_report(sizes, args.budget_kb)
+    over_budget = [size for size in sizes if size.page_bytes > args.budget_kb * 1024]
+    if len(over_budget) > 0:
+        print("=== {} page(s) over the budget of {} KB ===".format(len(over_budget),
+                                                                  args.budget_kb))
+    else:
+        print("=== All the pages are within the budget of {} KB ===".format(args.budget_kb))
+    return len(over_budget)
+
+
+if __name__ == "__main__":
+    sys.exit(main_func())
@@ -0,0 +1,147 @@
+"""
+Compiles `strings.js` into the compact tables injected in the reader pages.
+
+The STRINGS and ERRORS tables are parsed with the parser of logs_codes.py, and
+the usages of the codes are collected over the web-extension files. The codes
+which are never used are stripped, and the remaining strings are stored in a
+dense array per locale, the codes being mapped to their index in it.
+
+Only these tables are generated: the Logs and Localization objects using them
+are defined by `strings-runtime.js`, which the manifest injects right after.
+"""
+import argparse
+import json
+import sys
+
+from cache import CACHE_PATH, ScanCache
+from engine import scan_files
+from logs_codes import STRINGS_PATH, CodesRule
+from utils import iter_js_files, write_if_changed
+
+
+COMPILED_PATH = 'web-extension/strings.compiled.js'
+DEFAULT_LANG = 'en'
+# Codes used by the runtime itself, with a computed argument
+RUNTIME_CODES = ['E0000']
+
+# Only the tables are generated: the code using them is the one of RUNTIME_PATH,
+# injected right after the compiled file.
+RUNTIME_PATH = 'web-extension/strings-runtime.js'
+TABLES = """/* Generated by tools/strings_compiler.py from {strings_path}: do not edit. */
+/* The runtime using these tables is {runtime_path}. */
+
+/* eslint-disable no-unused-vars */
+const STRING_CODES = {string_codes};
+const STRING_TEXTS = {string_texts};
+const ERROR_CODES = {error_codes};
+/* eslint-enable no-unused-vars */
+"""
+
+
+def collect_usages(rule, root='web-extension', cache=None):
+    """
+    Starts the rule and collects the usages of the codes over the files of
+    `root`. Returns the errors found.
+    """
+    errors = []
+    rule.start(errors)
+    for check in scan_files([rule], iter_js_files(root), cache):
+        if check.findings is not None:
+            rule.collect(check.path, check.findings[rule.cache_key], errors)
+    return errors
+
+
+def compile_tables(error_codes, string_codes, keep_unused=False):
+    """
+    Returns the `(string_codes, string_texts, error_codes)` tables of the
+    compiled file: the index of every string code kept, the array of the
+    texts of every locale, and the index of the string of every error code
+    kept.
+
+    An error code is kept if it is used, and a string code if it is used
+    either directly or through an error code which is kept.
+    """
+    kept_errors = [code for code, entry in error_codes.items()
+                   if keep_unused or entry['usages'] or code in RUNTIME_CODES]
+    used_strings = set(error_codes[code]['string'] for code in kept_errors)
+    kept_strings = [code for code, entry in string_codes.items()
+                    if keep_unused or entry['usages'] or code in used_strings]
+
+    indexes = {code: index for index, code in enumerate(kept_strings)}
+    langs = sorted(set(lang for code in kept_strings for lang in string_codes[code]['texts'])
+                   | {DEFAULT_LANG})
+    # Missing translations are stored as null, and fall back to the default
+    # language at runtime.
+    texts = {lang: [string_codes[code]['texts'].get(lang) for code in kept_strings]
+             for lang in langs}
+    errors = {code: indexes[error_codes[code]['string']] for code in kept_errors
+              if error_codes[code]['string'] in indexes}
+    return indexes, texts, errors
+
+
+def render(tables, strings_path=STRINGS_PATH):
+    string_codes, string_texts, error_codes = tables
+
+    def dump(value):
+        return json.dumps(value, ensure_ascii=False, separators=(',', ':'))
+
+    return TABLES.format(strings_path=strings_path, runtime_path=RUNTIME_PATH,
+                         string_codes=dump(string_codes), string_texts=dump(string_texts),
+                         error_codes=dump(error_codes))
+
+
+def generate(root='web-extension', strings_path=STRINGS_PATH, cache=None, keep_unused=False):
+    """
+    Returns the content of the compiled file along with its tables and the
+    rule used to collect the codes, or None if no string code was found.
+    """
+    rule = CodesRule(strings_path)
+    errors = collect_usages(rule, root, cache)
+    if len(rule.string_codes) == 0:
+        for error in errors:
+            print("=> {}".format(error))
+        print('No string code found in "{}", aborting...'.format(strings_path))
+        return None
+    tables = compile_tables(rule.error_codes, rule.string_codes, keep_unused)
+    return render(tables, strings_path), tables, rule
+
+
+def compile_strings(root='web-extension', strings_path=STRINGS_PATH, output=COMPILED_PATH,
+                    cache=None, keep_unused=False):
+    generated = generate(root, strings_path, cache, keep_unused)
+    if generated is None:
+        return 1
+    content, tables, rule = generated
+    try:
+        written = write_if_changed(content, output)
+    except OSError as e:
+        print('Failed to write into "{}": {}'.format(output, e))
+        return 4
+    print("{} {} string codes (out of {}) and {} error codes (out of {}) into '{}'".format(
+        'Compiled' if written else 'Already up-to-date:', len(tables[0]),
+        len(rule.string_codes), len(tables[2]), len(rule.error_codes), output))
+    return 0
+
+
+def main_func(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--root', default='web-extension',
+                        help='Directory of the files using the codes')
+    parser.add_argument('--strings-path', default=STRINGS_PATH,
+                        help='Path of the file defining the codes')
+    parser.add_argument('-o', '--output', default=COMPILED_PATH,
+                        help='Path of the compiled file (default: {})'.format(COMPILED_PATH))
+    parser.add_argument('--keep-unused', action='store_true',
+                        help='Keep the codes which are never used')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='Scan all the files, ignoring (and not updating) the cache')
+    args = parser.parse_args(argv)
+    cache = None if args.no_cache else ScanCache(CACHE_PATH).load()
+    ret = compile_strings(args.root, args.strings_path, args.output, cache, args.keep_unused)
+    if cache is not None:
+        cache.save()
+    return ret
+
+
+if __name__ == "__main__":
+    sys.exit(main_func())
@@ -1,20 +1,192 @@
-from os import listdir
-from os.path import isfile, join
+from fnmatch import fnmatch
+import os
+import re
 
 
-def get_all_js_files(path, filter_path=None):
-    all_files = []
+# Directories which never hold sources of the web-extension
+DEFAULT_EXCLUDES = ['node_modules', 'build', '.git']
 
-    for f in listdir(path):
-        f_path = join(path, f)
-        if filter_path is not None and f_path.endswith(filter_path):
-            continue
-        if isfile(f_path):
-            if f_path.endswith('js'):
-                all_files.append(f_path)
+
+def _translate_glob(pattern):
+    """
+    Translates a `.gitignore` glob into a regex: `*` and `?` do not match
+    directory separators, while `**` does.
+    """
+    regex = ''
+    i = 0
+    while i < len(pattern):
+        if pattern.startswith('**/', i):
+            regex += '(?:.*/)?'
+            i += 3
+        elif pattern.startswith('/**', i) and i + 3 == len(pattern):
+            regex += '/.*'
+            i += 3
+        elif pattern.startswith('**', i):
+            regex += '.*'
+            i += 2
+        elif pattern[i] == '*':
+            regex += '[^/]*'
+            i += 1
+        elif pattern[i] == '?':
+            regex += '[^/]'
+            i += 1
+        elif pattern[i] == '[' and ']' in pattern[i + 1:]:
+            end = pattern.index(']', i + 1)
+            regex += '[{}]'.format(pattern[i + 1:end].replace('!', '^', 1))
+            i = end + 1
         else:
-            all_files.extend(get_all_js_files(f_path))
-    return all_files
+            regex += re.escape(pattern[i])
+            i += 1
+    return regex
+
+
+class IgnorePatterns:
+    """
+    Set of `.gitignore`-style patterns, each of them being relative to the
+    directory of the file it comes from. As with git, the last matching
+    pattern wins, and a `!` pattern re-includes what an earlier one excluded.
+    """
+
+    def __init__(self, patterns=None):
+        self._patterns = list(patterns or [])
+
+    def extend(self, base, lines):
+        """
+        Returns a new IgnorePatterns with the patterns from `lines` (relative
+        to the `base` directory) added.
+        """
+        patterns = list(self._patterns)
+        for line in lines:
+            line = line.rstrip('\n').rstrip()
+            if not line or line.startswith('#'):
+                continue
+            negate = line.startswith('!')
+            if negate:
+                line = line[1:]
+            dir_only = line.endswith('/')
+            line = line.rstrip('/')
+            # Patterns with a slash other than a trailing one are relative to
+            # the base directory, the others may match at any depth.
+            if '/' in line:
+                regex = '^{}$'.format(_translate_glob(line.lstrip('/')))
+            else:
+                regex = '(?:^|/){}$'.format(_translate_glob(line))
+            patterns.append((os.path.abspath(base), re.compile(regex), negate, dir_only))
+        return IgnorePatterns(patterns)
+
+    def extend_from_file(self, directory):
+        try:
+            with open(os.path.join(directory, '.gitignore'), 'r') as f:
+                return self.extend(directory, f.readlines())
+        except OSError:
+            return self
+
+    def ignored(self, abs_path, is_dir):
+        ignored = False
+        for base, regex, negate, dir_only in self._patterns:
+            if dir_only and not is_dir:
+                continue
+            if not abs_path.startswith(base + os.sep):
+                continue
+            rel_path = abs_path[len(base) + 1:].replace(os.sep, '/')
+            if regex.search(rel_path):
+                ignored = not negate
+        return ignored
+
+
+def _parent_ignore_patterns(path):
+    """
+    Loads the `.gitignore` files from the parent directories of `path`, up to
+    the root of its git repository.
+    """
+    parents = []
+    directory = os.path.dirname(os.path.abspath(path))
+    while True:
+        parents.append(directory)
+        if os.path.isdir(os.path.join(directory, '.git')):
+            break
+        parent = os.path.dirname(directory)
+        if parent == directory:
+            # Not in a git repository: only the path's own ignore files apply
+            parents = []
+            break
+        directory = parent
+    patterns = IgnorePatterns()
+    for directory in reversed(parents):
+        patterns = patterns.extend_from_file(directory)
+    return patterns
+
+
+def is_ignored(path, root, exclude=None):
+    """
+    Tells whether a file would be skipped by `iter_files(root)`, either because
+    one of its parent directories is excluded or because git ignores it.
+    """
+    if exclude is None:
+        exclude = DEFAULT_EXCLUDES
+    abs_path = os.path.abspath(path)
+    parts = os.path.relpath(abs_path, os.path.abspath(root)).split(os.sep)
+    if any(fnmatch(part, glob) for part in parts for glob in exclude):
+        return True
+    patterns = _parent_ignore_patterns(abs_path)
+    # Directories are checked as well, as git does not look into the ignored
+    # ones.
+    directory = abs_path
+    while True:
+        parent = os.path.dirname(directory)
+        if parent == directory:
+            break
+        directory = parent
+        if patterns.ignored(directory, True):
+            return True
+    return patterns.ignored(abs_path, False)
+
+
+def iter_files(path, include=None, exclude=None, use_gitignore=True):
+    """
+    Yields the paths of the files under `path`, as they are found.
+
+    `include` and `exclude` are lists of globs matched against the names and
+    the paths (relative to `path`) of the entries: excluded directories are
+    not walked into, and when `include` is set, only the matching files are
+    yielded. With `use_gitignore`, the entries ignored by the `.gitignore`
+    files of the repository are skipped as well.
+    """
+    if exclude is None:
+        exclude = DEFAULT_EXCLUDES
+    abs_root = os.path.abspath(path)
+
+    def matches(globs, name, rel_path):
+        return any(fnmatch(name, glob) or fnmatch(rel_path, glob) for glob in globs)
+
+    def walk(directory, abs_directory, patterns):
+        if use_gitignore:
+            patterns = patterns.extend_from_file(abs_directory)
+        try:
+            with os.scandir(directory) as it:
+                entries = sorted(it, key=lambda entry: entry.name)
+        except OSError as e:
+            print('Failed to list "{}": {}'.format(directory, e))
+            return
+        for entry in entries:
+            abs_path = os.path.join(abs_directory, entry.name)
+            rel_path = abs_path[len(abs_root) + 1:].replace(os.sep, '/')
+            is_dir = entry.is_dir()
+            if matches(exclude, entry.name, rel_path):
+                continue
+            if use_gitignore and patterns.ignored(abs_path, is_dir):
+                continue
+            if is_dir:
+                yield from walk(entry.path, abs_path, patterns)
+            elif include is None or matches(include, entry.name, rel_path):
+                yield entry.path
+
+    patterns = _parent_ignore_patterns(path) if use_gitignore else IgnorePatterns()
+    yield from walk(path, abs_root, patterns)
+
+
+def iter_js_files(path, exclude=None, use_gitignore=True):
+    return iter_files(path, ['*.js'], exclude, use_gitignore)
 
 
 def get_file_content(path):
@@ -24,3 +196,19 @@ def get_file_content(path):
     except Exception as e:
         print('get_file_content failed on "{}": {}'.format(path, e))
         return None
+
+
+def write_if_changed(content, path):
+    """
+    Writes the content into the file, unless it already holds it (so that its
+    mtime is left untouched). Returns whether the file was written.
+    """
+    try:
+        with open(path, 'r') as f:
+            if f.read() == content:
+                return False
+    except OSError:
+        pass
+    with open(path, 'w') as f:
+        f.write(content)
+    return True
@@ -0,0 +1,251 @@
+"""
+Watch mode of the JS code checkers: the findings of all the files are kept in
+memory, and only the files touched are scanned again when they change.
+"""
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import time
+
+from engine import report, scan_files
+from utils import is_ignored, iter_files, iter_js_files
+
+
+# See inotify(7)
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+WATCH_MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+EVENT_HEADER = struct.Struct('iIII')
+
+# Time without any new event before handling the changes, as editors usually
+# save files in several steps.
+SETTLE_DELAY = 0.02
+POLL_INTERVAL = 0.1
+
+
+class InotifyWatcher:
+    """
+    Reports the files changed under a directory, using inotify.
+    """
+
+    def __init__(self, root):
+        libc_name = ctypes.util.find_library('c')
+        if libc_name is None:
+            raise OSError('libc not found')
+        self._libc = ctypes.CDLL(libc_name, use_errno=True)
+        if not hasattr(self._libc, 'inotify_init1'):
+            raise OSError('inotify is not available')
+        self._fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), 'inotify_init1 failed')
+        self._root = root
+        self._dirs = {}
+        self._add_watch(root)
+        for path in iter_files(root):
+            self._add_watch(os.path.dirname(path))
+
+    def _add_watch(self, directory):
+        if directory in self._dirs.values():
+            return
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(directory), WATCH_MASK)
+        if wd < 0:
+            print('Failed to watch "{}": errno {}'.format(directory, ctypes.get_errno()))
+            return
+        self._dirs[wd] = directory
+
+    def _read_events(self, changes):
+        try:
+            data = os.read(self._fd, 64 * 1024)
+        except BlockingIOError:
+            return
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+            offset += EVENT_HEADER.size
+            name = os.fsdecode(data[offset:offset + length].rstrip(b'\0'))
+            offset += length
+            if mask & IN_IGNORED:
+                self._dirs.pop(wd, None)
+                continue
+            directory = self._dirs.get(wd)
+            if directory is None or not name:
+                continue
+            path = os.path.join(directory, name)
+            if mask & IN_ISDIR:
+                if mask & (IN_CREATE | IN_MOVED_TO) and not is_ignored(path, self._root):
+                    self._add_watch(path)
+                    # Files may have been added before the watch was set up
+                    changes.update(iter_files(path))
+                continue
+            changes.add(path)
+
+    def changes(self):
+        """
+        Yields the sets of paths which changed, waiting for them to settle.
+        """
+        while True:
+            select.select([self._fd], [], [])
+            changes = set()
+            self._read_events(changes)
+            while select.select([self._fd], [], [], SETTLE_DELAY)[0]:
+                self._read_events(changes)
+            if changes:
+                yield changes
+
+    def close(self):
+        os.close(self._fd)
+
+
+class PollingWatcher:
+    """
+    Reports the files changed under a directory, by comparing the stat
+    information of the files at a regular interval.
+    """
+
+    def __init__(self, root):
+        self._root = root
+        self._stats = self._stat_all()
+
+    def _stat_all(self):
+        stats = {}
+        for path in iter_js_files(self._root):
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            stats[path] = (st.st_mtime_ns, st.st_size)
+        return stats
+
+    def changes(self):
+        while True:
+            time.sleep(POLL_INTERVAL)
+            stats = self._stat_all()
+            changes = set(path for path in set(stats) | set(self._stats)
+                          if stats.get(path) != self._stats.get(path))
+            self._stats = stats
+            if changes:
+                yield changes
+
+    def close(self):
+        pass
+
+
+def make_watcher(root, poll=False):
+    if not poll:
+        try:
+            return InotifyWatcher(root)
+        except OSError as e:
+            print('inotify unavailable ({}), falling back to polling'.format(e))
+    return PollingWatcher(root)
+
+
+class WatchSession:
+    """
+    Keeps the findings and errors of every file in memory, so that a change
+    only requires scanning the touched file, and updating the global state of
+    the rules (such as the usage counts of the codes) for this file only.
+    """
+
+    def __init__(self, rules, root, cache=None, jobs=1):
+        self._rules = rules
+        self._root = root
+        self._cache = cache
+        self._jobs = jobs
+        self._checks = {}
+        self._file_errors = {}
+        self._start_errors = []
+
+    def _start_rules(self):
+        self._start_errors = []
+        for rule in self._rules:
+            rule.start(self._start_errors)
+
+    def _collect(self, check):
+        errors = []
+        if check.findings is not None:
+            for i in check.rule_indexes:
+                self._rules[i].collect(check.path, check.findings[self._rules[i].cache_key],
+                                       errors)
+        self._checks[check.path] = check
+        self._file_errors[check.path] = errors
+
+    def _discard(self, path):
+        check = self._checks.pop(path, None)
+        self._file_errors.pop(path, None)
+        if check is None or check.findings is None:
+            return
+        for i in check.rule_indexes:
+            self._rules[i].discard(path, check.findings[self._rules[i].cache_key])
+
+    def run(self):
+        self._start_rules()
+        for check in scan_files(self._rules, iter_js_files(self._root), self._cache,
+                                self._jobs):
+            self._collect(check)
+
+    def update(self, paths):
+        """
+        Takes the changes of the given files into account. Returns the number
+        of files actually checked.
+        """
+        if any(rule.depends_on(path) for rule in self._rules for path in paths):
+            # The rules' own data changed: start them again, and collect the
+            # findings of all the files from memory.
+            self._start_rules()
+            checks = [self._checks[path] for path in sorted(self._checks)]
+            self._checks = {}
+            for check in checks:
+                self._collect(check)
+        to_scan = []
+        for path in sorted(paths):
+            self._discard(path)
+            if (path.endswith('.js') and os.path.isfile(path)
+                    and not is_ignored(path, self._root)):
+                to_scan.append(path)
+        for check in scan_files(self._rules, to_scan, self._cache):
+            self._collect(check)
+        if self._cache is not None:
+            self._cache.save()
+        return len(to_scan)
+
+    def errors(self):
+        errors = list(self._start_errors)
+        for path in sorted(self._file_errors):
+            errors.extend(self._file_errors[path])
+        for rule in self._rules:
+            rule.finish(errors)
+        return errors
+
+
+def watch(rules, root, cache=None, jobs=1, poll=False):
+    session = WatchSession(rules, root, cache, jobs)
+    session.run()
+    if cache is not None:
+        cache.save()
+    report(session.errors())
+    watcher = make_watcher(root, poll)
+    print("=== Watching '{}' for changes (Ctrl-C to stop) ===".format(root))
+    try:
+        for changes in watcher.changes():
+            start = time.perf_counter()
+            nb_checked = session.update(changes)
+            errors = session.errors()
+            print("=> [{}] {} file(s) changed, {} checked in {:.1f} ms"
+                  .format(time.strftime('%H:%M:%S'), len(changes), nb_checked,
+                          (time.perf_counter() - start) * 1000))
+            report(errors)
+            sys.stdout.flush()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        watcher.close()
+    return 0
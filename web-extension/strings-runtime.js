@@ -0,0 +1,116 @@
+/* globals
+    cloneArray
+    ERROR_CODES
+    STRING_CODES
+    STRING_TEXTS
+*/
+
+/*
+ * Runtime of the strings compiled by tools/strings_compiler.py: the tables
+ * (STRING_CODES, STRING_TEXTS and ERROR_CODES) are defined by
+ * strings.compiled.js, which is injected right before this file.
+ */
+
+const INFO = 0;
+const DEBUG = 1;
+const WARNING = 2;
+const ERROR = 3;
+
+const DEFAULT_LANG = 'en';
+
+String.prototype.improvedFormatter = String.prototype.improvedFormatter ||
+function () {
+    'use strict';
+    var str = this.toString();
+
+    if (arguments.length) {
+        var t = typeof arguments[0];
+        var key;
+        var args = ('string' === t || 'number' === t) ? cloneArray(arguments) : arguments[0];
+
+        for (key in args) {
+            str = str.replace(new RegExp('\\{' + key + '\\}', 'gi'), args[key]);
+        }
+    }
+
+    return str;
+};
+
+function Localization(lang = DEFAULT_LANG) {
+    this.lang = lang;
+}
+
+Localization.prototype.hasString = function(s) {
+    return Object.prototype.hasOwnProperty.call(STRING_CODES, s);
+};
+
+Localization.prototype.getText = function(index) {
+    const texts = STRING_TEXTS[this.lang];
+    if (texts === undefined || texts[index] === null) {
+        return STRING_TEXTS[DEFAULT_LANG][index];
+    }
+    return texts[index];
+};
+
+Localization.prototype.getString = function(s, add) {
+    if (!this.hasString(s)) {
+        return 'Unknown string: ' + s;
+    }
+    const text = this.getText(STRING_CODES[s]);
+    if (add) {
+        return text.improvedFormatter(add);
+    }
+    return text;
+};
+
+function Logs(level = INFO) {
+    this.level = level;
+}
+
+Logs.prototype.display = function(e, printer, add) {
+    printer(this.getString(e, add));
+};
+
+Logs.prototype.log = function(e, add) {
+    // eslint-disable-next-line no-console
+    this.display(e, console.log, add);
+};
+
+Logs.prototype.debug = function(e, add) {
+    if (this.level >= DEBUG) {
+        // eslint-disable-next-line no-console
+        this.display(e, console.debug, add);
+    }
+};
+
+Logs.prototype.warn = function(e, add) {
+    if (this.level >= WARNING) {
+        // eslint-disable-next-line no-console
+        this.display(e, console.warn, add);
+    }
+};
+
+Logs.prototype.error = function(e, add) {
+    if (this.level >= ERROR) {
+        // eslint-disable-next-line no-console
+        this.display(e, console.error, add);
+    }
+};
+
+Logs.prototype.getString = function(e, add) {
+    if (e.startsWith('E')) {
+        if (Object.prototype.hasOwnProperty.call(ERROR_CODES, e)) {
+            const text = LOCALIZATION.getText(ERROR_CODES[e]);
+            return `[${e}] ${add ? text.improvedFormatter(add) : text}`;
+        }
+    } else if (LOCALIZATION.hasString(e)) {
+        return LOCALIZATION.getString(e, add);
+    }
+    return this.getString('E0000', e);
+};
+
+/* eslint-disable no-unused-vars */
+/* Globals imported through the including of files driven by manifest.json */
+const LOGS = new Logs();
+const LOCALIZATION = new Localization();
+/* eslint-enable no-unused-vars */
@@ -112,9 +112,9 @@ function Localization(lang = DEFAULT_LANG) {
         // 'S27': {
         //     'en': 'BmcMessagingHandler: EventData is of unexpected type',
         // },
-        'S28': {
-            'en': 'Received RUNTIME message: {msg}',
-        },
+        // 'S28': {
+        //     'en': 'Received RUNTIME message: {msg}',
+        // },
         // 'S29': {
         //     'en': 'BmcMessagingHandler: event is of unexpected type',
         // },